@@ -0,0 +1,236 @@
+"""Frozen copy of the baseline (c9c3b85) watermark renderer, used as the render harness reference.
+
+The methods below are copied verbatim from the baseline `WatermarkApp`; do not edit them to
+follow the app. `BaselineRenderer` stands in for the Tk variables they read, filled from a
+template spec. The only change is in `apply_image_watermark`, which re-raises instead of
+showing a message box. Later features the baseline cannot render (custom and auto positions)
+are listed in `render_harness.BASELINE_EXCEPTIONS`.
+"""
+import os
+from datetime import datetime
+from typing import Optional
+
+from PIL import Image, ImageDraw, ImageFont, ImageColor
+
+
+class _Value:
+    """Read-only stand-in for a Tk variable or entry"""
+
+    def __init__(self, value):
+        self._value = value
+
+    def get(self):
+        return self._value
+
+
+class BaselineRenderer:
+    def __init__(self, spec: dict):
+        self.watermark_type = _Value(spec['watermark_type'])
+        self.text_entry = _Value(spec['text'])
+        self.font_family = _Value(spec['font_family'])
+        self.font_size = _Value(spec['font_size'])
+        self.color_var = _Value(spec['color'])
+        self.opacity = _Value(spec['opacity'])
+        self.image_scale = _Value(spec['image_scale'])
+        self.image_opacity = _Value(spec['image_opacity'])
+        self.position_var = _Value(spec['position'])
+        self.rotation = _Value(spec.get('rotation', 0))
+        self.watermark_config = {'image_path': spec['image_path']}
+
+    def _resolve_font_path(self, family_name: str) -> Optional[str]:
+        """Resolve a usable TTF/TTC path for the given font family on Windows.
+        Tries common filenames in the Windows Fonts directory and generic fallbacks."""
+        try:
+            windows_dir = os.environ.get('WINDIR', r'C:\\Windows')
+            fonts_dir = os.path.join(windows_dir, 'Fonts')
+            candidates = []
+            # From family name
+            if family_name:
+                base = family_name.replace(' ', '')
+                candidates += [
+                    f"{base}.ttf", f"{base}.ttc",
+                    f"{base}.TTF", f"{base}.TTC",
+                    f"{family_name}.ttf", f"{family_name}.ttc",
+                ]
+            # Common Latin and CJK fonts
+            candidates += [
+                'arial.ttf', 'calibri.ttf', 'times.ttf', 'cour.ttf',
+                'msyh.ttc', 'msyh.ttf', 'msyhbd.ttc',  # Microsoft YaHei
+                'simsun.ttc', 'simhei.ttf',            # SimSun / SimHei
+                'Tahoma.ttf', 'Verdana.ttf'
+            ]
+            for cand in candidates:
+                cand_path = os.path.join(fonts_dir, cand)
+                if os.path.exists(cand_path):
+                    return cand_path
+        except Exception:
+            pass
+        return None
+
+    def _get_truetype_font(self, size: int) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+        """Get a scalable font. Try requested family, then Windows Fonts, then DejaVuSans, else default."""
+        family = None
+        try:
+            family = self.font_family.get()
+        except Exception:
+            family = 'Arial'
+        # 1) Try direct by family (works if Pillow can locate it)
+        try:
+            return ImageFont.truetype(family, size)
+        except Exception:
+            pass
+        # 2) Try resolve Windows font path
+        resolved = self._resolve_font_path(family)
+        if resolved:
+            try:
+                return ImageFont.truetype(resolved, size)
+            except Exception:
+                pass
+        # 3) Try DejaVuSans bundled with PIL
+        try:
+            return ImageFont.truetype('DejaVuSans.ttf', size)
+        except Exception:
+            pass
+        # 4) Fallback to small default bitmap font
+        return ImageFont.load_default()
+
+    def apply_watermark(self, image):
+        """Apply watermark to image"""
+        if self.watermark_type.get() == "text":
+            return self.apply_text_watermark(image)
+        else:
+            return self.apply_image_watermark(image)
+    
+    def apply_text_watermark(self, image):
+        """Apply text watermark"""
+        if image.mode != "RGBA":
+            image = image.convert("RGBA")
+        
+        # Create base transparent overlay sized to the image
+        overlay = Image.new("RGBA", image.size, (0, 0, 0, 0))
+        
+        # Get font (robust TrueType fallback so watermark is visible)
+        font = self._get_truetype_font(self.font_size.get())
+        
+        # Get text (fallback to current date/time if empty)
+        text = self.text_entry.get()
+        if not text or text.strip() == "":
+            text = datetime.now().strftime("%Y-%m-%d %H:%M")
+        
+        # Measure text size using a temporary draw context
+        tmp_draw = ImageDraw.Draw(overlay)
+        bbox = tmp_draw.textbbox((0, 0), text, font=font)
+        text_width = bbox[2] - bbox[0]
+        text_height = bbox[3] - bbox[1]
+        
+        # Get color and opacity
+        try:
+            color = ImageColor.getrgb(self.color_var.get())
+        except:
+            color = (255, 255, 255)
+        
+        opacity = int(self.opacity.get() * 2.55)  # Convert to 0-255 range
+        
+        # Create a separate watermark layer sized to the text, draw text then rotate
+        shadow_offset = 2
+        text_layer_w = text_width + shadow_offset
+        text_layer_h = text_height + shadow_offset
+        text_layer = Image.new("RGBA", (text_layer_w, text_layer_h), (0, 0, 0, 0))
+        text_draw = ImageDraw.Draw(text_layer)
+        
+        shadow_color = (0, 0, 0, min(255, opacity))
+        text_color = (*color, opacity)
+        
+        # Draw shadow and text using bbox offset to avoid clipping ascenders/descenders
+        origin_x = -bbox[0]
+        origin_y = -bbox[1]
+        text_draw.text((origin_x + shadow_offset, origin_y + shadow_offset), text, font=font, fill=shadow_color)
+        text_draw.text((origin_x, origin_y), text, font=font, fill=text_color)
+        
+        # Apply rotation
+        angle = self.rotation.get() if hasattr(self, 'rotation') else 0
+        if angle:
+            text_layer = text_layer.rotate(angle, expand=True, resample=Image.Resampling.BICUBIC)
+        
+        # Compute position based on rotated size
+        position = self.get_watermark_position(image.size, text_layer.size)
+        
+        # Paste rotated text layer onto overlay using its alpha
+        overlay.paste(text_layer, position, text_layer)
+        
+        # Merge layers
+        return Image.alpha_composite(image, overlay)
+    
+    def apply_image_watermark(self, image):
+        """Apply image watermark"""
+        if not self.watermark_config['image_path']:
+            return image
+        
+        try:
+            watermark_img = Image.open(self.watermark_config['image_path'])
+            if watermark_img.mode != "RGBA":
+                watermark_img = watermark_img.convert("RGBA")
+            
+            # Adjust watermark size
+            scale = self.image_scale.get()
+            new_size = (int(watermark_img.width * scale), int(watermark_img.height * scale))
+            watermark_img = watermark_img.resize(new_size, Image.Resampling.LANCZOS)
+            
+            # Adjust opacity
+            opacity = int(self.image_opacity.get() * 2.55)
+            if opacity < 255:
+                alpha = watermark_img.split()[-1]
+                alpha = alpha.point(lambda p: int(p * opacity / 255))
+                watermark_img.putalpha(alpha)
+            
+            # Apply rotation if any
+            angle = self.rotation.get() if hasattr(self, 'rotation') else 0
+            if angle:
+                watermark_img = watermark_img.rotate(angle, expand=True, resample=Image.Resampling.BICUBIC)
+            
+            # Calculate position
+            position = self.get_watermark_position(image.size, watermark_img.size)
+            
+            # Create transparent layer
+            if image.mode != "RGBA":
+                image = image.convert("RGBA")
+            
+            overlay = Image.new("RGBA", image.size, (0, 0, 0, 0))
+            overlay.paste(watermark_img, position, watermark_img)
+            
+            return Image.alpha_composite(image, overlay)
+            
+        except Exception as e:
+            raise RuntimeError(f"Failed to apply image watermark: {e}") from e
+    
+    def get_watermark_position(self, image_size, watermark_size):
+        """Calculate watermark position"""
+        img_width, img_height = image_size
+        wm_width, wm_height = watermark_size
+        margin = 20
+        
+        position = self.position_var.get()
+        
+        if position == "top-left":
+            return (margin, margin)
+        elif position == "top-center":
+            return ((img_width - wm_width) // 2, margin)
+        elif position == "top-right":
+            return (img_width - wm_width - margin, margin)
+        elif position == "middle-left":
+            return (margin, (img_height - wm_height) // 2)
+        elif position == "center":
+            return ((img_width - wm_width) // 2, (img_height - wm_height) // 2)
+        elif position == "middle-right":
+            return (img_width - wm_width - margin, (img_height - wm_height) // 2)
+        elif position == "bottom-left":
+            return (margin, img_height - wm_height - margin)
+        elif position == "bottom-center":
+            return ((img_width - wm_width) // 2, img_height - wm_height - margin)
+        else:  # bottom-right
+            return (img_width - wm_width - margin, img_height - wm_height - margin)
+
+
+def baseline_render(image: Image.Image, spec: dict) -> Image.Image:
+    """Render `spec` onto a copy of image exactly as the baseline app did (always RGBA)"""
+    return BaselineRenderer(spec).apply_watermark(image.copy())
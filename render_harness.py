@@ -0,0 +1,402 @@
+"""Golden-image differential harness for watermark render paths.
+
+Renders a matrix of watermark specs over a set of inputs and checks the app's
+renderer (`WatermarkApp.apply_watermark`) against a frozen copy of the baseline
+renderer (`render_baseline.py`). Intended divergences from the baseline are
+listed by name in `BASELINE_EXCEPTIONS`. Every alternative render path is then
+compared against the app's renderer, either by pixel hash or by a bounded
+per-channel error. The baseline's hashes are kept in golden.json, so a change
+to the frozen reference or its environment shows up as well.
+
+    python render_harness.py                      # check the baseline and compare all paths
+    python render_harness.py --images image       # add real photos (shrunk to --max-edge)
+    python render_harness.py --update             # re-record golden.json from the frozen baseline
+
+Golden hashes depend on the installed fonts and Pillow version, so record and
+check them on the same machine image.
+"""
+import argparse
+import hashlib
+import io
+import itertools
+import json
+import sys
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageChops, ImageCms, TiffImagePlugin
+
+from render_baseline import baseline_render
+from watermark_gui import DEEP_GRAY_MODES, IMAGE_EXTENSIONS, ImagePyramid, OutputSink, WatermarkApp
+
+GOLDEN_PATH = Path(__file__).with_name('golden.json')
+
+# name -> (render function, max allowed per-channel error; 0 means pixel-identical,
+#          input modes the path applies to; None means all)
+RENDER_PATHS: Dict[str, Tuple[Callable, int, Optional[Tuple[str, ...]]]] = {}
+
+
+def render_path(name: str, tolerance: int = 0, modes: Optional[Tuple[str, ...]] = None):
+    """Register an alternative render path: fn(app, image, spec) -> Image"""
+    def decorator(fn):
+        RENDER_PATHS[name] = (fn, tolerance, modes)
+        return fn
+    return decorator
+
+
+class MemorySink(OutputSink):
+    """Keep committed outputs in memory so the export pipeline can be compared"""
+
+    def __init__(self):
+        self.files: Dict[str, bytes] = {}
+        super().__init__()
+
+    def _commit(self, name: str, data: bytes) -> str:
+        self.files[name] = data
+        return name
+
+
+def reference_render(app: WatermarkApp, image: Image.Image, spec: dict) -> Image.Image:
+    return app.apply_watermark(image.copy(), spec)
+
+
+def to_source_mode(result: Image.Image, source: Image.Image) -> Image.Image:
+    """Convert an RGBA render back to the source's mode (P maps onto the source palette)"""
+    if source.mode == "P":
+        return result.convert("RGB").quantize(palette=source, dither=Image.Dither.NONE)
+    return result if source.mode == "RGBA" else result.convert(source.mode)
+
+
+# Intended divergences of the app's renderer from the frozen baseline, by name. The first
+# matching entry applies: (matches(image, spec), expected app output derived from the baseline
+# output, or None when the baseline cannot render the case and it is not compared)
+BASELINE_EXCEPTIONS: Dict[str, Tuple[Callable[[Image.Image, dict], bool], Optional[Callable]]] = {
+    # user-034: the baseline only knows the nine preset anchors
+    'custom-position': (lambda image, spec: spec['position'] == 'custom', None),
+    # user-038: anchor scored on the image content
+    'auto-position': (lambda image, spec: spec['position'] == 'auto', None),
+    # user-040: 16-bit grayscale blends at full depth; the baseline clipped it to 8 bits
+    'deep-gray-full-depth': (lambda image, spec: image.mode in DEEP_GRAY_MODES, None),
+    # user-040: the output keeps the source mode; the baseline always returned RGBA
+    'mode-preserving-output': (lambda image, spec: image.mode != "RGBA",
+                               lambda baseline, image: to_source_mode(baseline, image)),
+}
+
+
+def baseline_exception(image: Image.Image, spec: dict) -> Optional[str]:
+    for name, (matches, _) in BASELINE_EXCEPTIONS.items():
+        if matches(image, spec):
+            return name
+    return None
+
+
+@render_path('full-frame-rgba', tolerance=1, modes=("RGB", "RGBA", "L", "P", "CMYK"))
+def full_frame_rgba_render(app, image, spec):
+    """Composite on a whole-frame RGBA copy and convert back, as before mode-preserving compositing"""
+    return to_source_mode(app.apply_watermark(image.convert("RGBA"), spec), image)
+
+
+@render_path('export-pipeline')
+def export_pipeline_render(app, image, spec):
+    """Full export pipeline (decode, targets, PNG encode, sink) at source resolution"""
+    with tempfile.TemporaryDirectory() as tmp:
+        # PNG cannot store CMYK
+        source = Path(tmp) / ("source.tif" if image.mode == "CMYK" else "source.png")
+        image.save(source)
+        sink = MemorySink()
+        options = {'format': 'PNG', 'quality': 95, 'naming_rule': 'original',
+                   'prefix': '', 'suffix': '', 'max_edge': 0, 'resize_mode': 'fit'}
+        try:
+            futures = app.export_targets_for(source, sink, [{'spec': spec, 'options': options, 'subfolder': ''}])
+        finally:
+            sink.close()
+        name = futures[0].result()
+    with Image.open(io.BytesIO(sink.files[name])) as result:
+        result.load()
+        return result.copy()
+
+
+@render_path('frame-stream')
+def frame_stream_render(app, image, spec):
+    """Second page of a multi-page TIFF through the frame-by-frame export (LZW, lossless)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "source.tif"
+        # Append a copy: `image` may still carry encoder state from an earlier save
+        image.transpose(Image.Transpose.FLIP_LEFT_RIGHT).save(source, save_all=True, append_images=[image.copy()])
+        sink = MemorySink()
+        options = {'format': 'PNG', 'quality': 95, 'naming_rule': 'original',
+                   'prefix': '', 'suffix': '', 'max_edge': 0, 'resize_mode': 'fit'}
+        try:
+            futures = app.export_targets_for(source, sink, [{'spec': spec, 'options': options, 'subfolder': ''}])
+        finally:
+            sink.close()
+        name = futures[0].result()
+    with Image.open(io.BytesIO(sink.files[name])) as result:
+        result.seek(1)
+        result.load()
+        return result.copy()
+
+
+# The preview works on 8-bit RGBA, so only modes it shows unchanged are compared
+@render_path('viewport-1to1', modes=("RGB", "RGBA", "L"))
+def viewport_render(app, image, spec):
+    """1:1 preview viewports (tile-region decode from a stripped TIFF), stitched from 2x2 quadrants"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "source.tif"
+        # libtiff writes many strips, which exercises the tile-region decoder
+        previous = TiffImagePlugin.WRITE_LIBTIFF
+        TiffImagePlugin.WRITE_LIBTIFF = True
+        try:
+            image.save(source, compression='raw')
+        finally:
+            TiffImagePlugin.WRITE_LIBTIFF = previous
+        pyramid = ImagePyramid(source)
+        app.original_image = image
+        width, height = image.size
+        result = Image.new("RGBA", image.size)
+        for x0, x1 in ((0, width // 2), (width // 2, width)):
+            for y0, y1 in ((0, height // 2), (height // 2, height)):
+                if x1 > x0 and y1 > y0:
+                    box = (x0, y0, x1, y1)
+                    result.paste(app._composite_viewport(pyramid.region(box, 1.0), box, 1.0, spec), (x0, y0))
+    return result
+
+
+def check_icc_profiles(app: WatermarkApp, spec: dict) -> List[str]:
+    """Export sources carrying an ICC profile through the pipeline and return the cases whose
+    output lost it (CMYK to PNG is converted to RGB and must drop its CMYK profile)"""
+    profile = ImageCms.ImageCmsProfile(ImageCms.createProfile('sRGB')).tobytes()
+    cases = [('CMYK', 'JPEG', 'JPEG', True), ('RGB', 'JPEG', 'JPEG', True), ('L', 'JPEG', 'JPEG', True),
+             ('RGB', 'PNG', 'PNG', True), ('RGB', 'PNG', 'JPEG', True), ('CMYK', 'JPEG', 'PNG', False)]
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, source_format, output_format, kept in cases:
+            source = Path(tmp) / f"source.{source_format.lower()}"
+            Image.new(mode, (320, 240), 128).save(source, source_format, icc_profile=profile)
+            sink = MemorySink()
+            options = {'format': output_format, 'quality': 95, 'naming_rule': 'original',
+                       'prefix': '', 'suffix': '', 'max_edge': 0, 'resize_mode': 'fit'}
+            try:
+                futures = app.export_targets_for(source, sink, [{'spec': spec, 'options': options, 'subfolder': ''}])
+            finally:
+                sink.close()
+            with Image.open(io.BytesIO(sink.files[futures[0].result()])) as result:
+                found = result.info.get('icc_profile')
+            if (found == profile) != kept:
+                failures.append(f"{mode} {source_format} -> {output_format}: profile "
+                                f"{'lost' if kept else 'kept'} (output mode {result.mode})")
+    return failures
+
+
+def pixel_hash(image: Image.Image) -> str:
+    digest = hashlib.sha256(f"{image.mode}:{image.size}".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def max_channel_error(reference: Image.Image, candidate: Image.Image) -> int:
+    """Largest per-channel absolute difference, or -1 if the sizes differ"""
+    if reference.size != candidate.size:
+        return -1
+    # Palette indices are not comparable, and 16-bit modes differ only in byte order
+    if reference.mode == "P" or reference.mode.startswith("I"):
+        common = "RGBA" if reference.mode == "P" else "I"
+        reference, candidate = reference.convert(common), candidate.convert(common)
+    elif candidate.mode != reference.mode:
+        candidate = candidate.convert(reference.mode)
+    extrema = ImageChops.difference(reference, candidate).getextrema()
+    if isinstance(extrema[0], tuple):
+        return max(high for _, high in extrema)
+    return extrema[1]
+
+
+def synthetic_inputs() -> Dict[str, Image.Image]:
+    """Deterministic gradients in the modes and shapes the app accepts"""
+    def rgb(size):
+        width, height = size
+        red = Image.linear_gradient('L').resize(size)
+        green = Image.linear_gradient('L').rotate(90).resize(size)
+        blue = Image.radial_gradient('L').resize(size)
+        return Image.merge('RGB', (red, green, blue))
+
+    inputs = {
+        'rgb-640x480': rgb((640, 480)),
+        'rgb-odd-333x517': rgb((333, 517)),
+        'rgb-tiny-64x48': rgb((64, 48)),
+        'l-800x600': rgb((800, 600)).convert('L'),
+        'p-640x480': rgb((640, 480)).convert('P', palette=Image.Palette.ADAPTIVE),
+    }
+    inputs['cmyk-640x480'] = rgb((640, 480)).convert('CMYK')
+    inputs['i16-640x480'] = rgb((640, 480)).convert('L').convert('I').point(lambda v: v * 257).convert('I;16')
+    rgba = rgb((640, 480)).convert('RGBA')
+    rgba.putalpha(Image.radial_gradient('L').resize((640, 480)))
+    inputs['rgba-640x480'] = rgba
+    return inputs
+
+
+def load_inputs(folder: Path, max_edge: int) -> Dict[str, Image.Image]:
+    """Load real photos, shrunk to max_edge (0 keeps full size) to keep the matrix fast"""
+    inputs = {}
+    for path in sorted(folder.iterdir()):
+        if path.suffix.lower() in IMAGE_EXTENSIONS:
+            with Image.open(path) as img:
+                if max_edge:
+                    img.thumbnail((max_edge, max_edge))
+                img.load()
+                inputs[f"file-{path.name}"] = img.copy()
+    return inputs
+
+
+def make_logo(path: Path) -> None:
+    logo = Image.new('RGBA', (160, 90), (220, 40, 40, 255))
+    logo.putalpha(Image.linear_gradient('L').rotate(90).resize((160, 90)))
+    logo.save(path)
+
+
+def spec_matrix(logo_path: str) -> Dict[str, dict]:
+    base = {'watermark_type': 'text', 'text': 'Watermark Ag', 'font_family': 'Arial', 'font_size': 48,
+            'color': '#FFFFFF', 'opacity': 80, 'image_path': None, 'image_scale': 1.0,
+            'image_opacity': 80, 'position': 'bottom-right', 'rotation': 0}
+    specs = {}
+    for position, rotation, opacity, size in itertools.product(
+            ('top-left', 'center', 'bottom-right', 'middle-right'), (0, 30, -90), (100, 45), (24, 72)):
+        specs[f"text-{position}-r{rotation}-o{opacity}-s{size}"] = dict(
+            base, position=position, rotation=rotation, opacity=opacity, font_size=size)
+    specs['text-empty-color'] = dict(base, text='Plain', color='#12AB34')
+    for custom_x, custom_y in ((0.3, 0.7), (0.0, 1.0)):
+        specs[f"text-custom-{custom_x}-{custom_y}"] = dict(
+            base, position='custom', custom_x=custom_x, custom_y=custom_y, rotation=15)
+    for color in ('#FFFFFF', '#101010'):
+        specs[f"text-auto-{color[1:]}"] = dict(base, position='auto', color=color)
+    specs['image-auto'] = dict(base, watermark_type='image', image_path=logo_path, position='auto')
+    for position, rotation, opacity, scale in itertools.product(
+            ('top-left', 'center', 'bottom-right'), (0, 45), (100, 60), (0.5, 1.7)):
+        specs[f"image-{position}-r{rotation}-o{opacity}-x{scale}"] = dict(
+            base, watermark_type='image', image_path=logo_path, position=position,
+            rotation=rotation, image_opacity=opacity, image_scale=scale)
+    return specs
+
+
+def run(inputs: Dict[str, Image.Image], specs: Dict[str, dict],
+        paths: List[str]) -> Tuple[dict, Dict[str, dict], Dict[str, str]]:
+    """Returns the baseline check, the per-path results and the frozen baseline's hashes"""
+    app = WatermarkApp.create_renderer()
+    baseline_result = {'identical': 0, 'failed': [], 'excepted': {name: 0 for name in BASELINE_EXCEPTIONS}}
+    results = {name: {'identical': 0, 'within': 0, 'skipped': 0, 'failed': [], 'worst': 0} for name in paths}
+    hashes = {}
+    for (input_name, image), (spec_name, spec) in itertools.product(inputs.items(), specs.items()):
+        case = f"{input_name}/{spec_name}"
+        baseline = baseline_render(image, spec)
+        hashes[case] = pixel_hash(baseline)
+        reference = reference_render(app, image, spec)
+        reference_hash = pixel_hash(reference)
+
+        exception = baseline_exception(image, spec)
+        if exception is not None:
+            baseline_result['excepted'][exception] += 1
+            expected = BASELINE_EXCEPTIONS[exception][1]
+            baseline = expected(baseline, image) if expected else None
+        if baseline is None:
+            pass
+        elif pixel_hash(baseline) == reference_hash:
+            baseline_result['identical'] += 1
+        else:
+            try:
+                detail = f"max channel error {max_channel_error(baseline, reference)}"
+            except ValueError:
+                detail = f"{reference.mode} output differs"
+            baseline_result['failed'].append(f"{case}: {detail}" + (f" (after {exception})" if exception else ""))
+
+        for name in paths:
+            render, tolerance, modes = RENDER_PATHS[name]
+            result = results[name]
+            if modes is not None and image.mode not in modes:
+                result['skipped'] += 1
+                continue
+            try:
+                candidate = render(app, image, spec)
+            except Exception as e:
+                result['failed'].append(f"{case}: {e}")
+                continue
+            if candidate.mode == reference.mode and pixel_hash(candidate) == reference_hash:
+                result['identical'] += 1
+                continue
+            error = max_channel_error(reference, candidate)
+            result['worst'] = max(result['worst'], error)
+            if 0 <= error <= tolerance:
+                result['within'] += 1
+            else:
+                detail = "size differs" if error < 0 else f"max channel error {error} > {tolerance}"
+                result['failed'].append(f"{case}: {detail}")
+    return baseline_result, results, hashes
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=Path, help="folder of extra input images")
+    parser.add_argument('--max-edge', type=int, default=1024, help="shrink --images inputs to this size (0 = full size)")
+    parser.add_argument('--paths', nargs='*', default=None, help="render paths to compare (default: all)")
+    parser.add_argument('--golden', type=Path, default=GOLDEN_PATH,
+                        help="JSON file of the frozen baseline's pixel hashes (default: golden.json)")
+    parser.add_argument('--update', action='store_true', help="rewrite the golden file from this run")
+    args = parser.parse_args(argv)
+
+    paths = args.paths if args.paths is not None else list(RENDER_PATHS)
+    unknown = [name for name in paths if name not in RENDER_PATHS]
+    if unknown:
+        parser.error(f"unknown render paths: {', '.join(unknown)} (known: {', '.join(RENDER_PATHS)})")
+
+    inputs = synthetic_inputs()
+    if args.images:
+        inputs.update(load_inputs(args.images, args.max_edge))
+
+    golden = {}
+    if args.golden.exists() and not args.update:
+        golden = json.loads(args.golden.read_text(encoding='utf-8'))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        logo_path = Path(tmp) / "logo.png"
+        make_logo(logo_path)
+        specs = spec_matrix(str(logo_path))
+        baseline_result, results, hashes = run(inputs, specs, paths)
+        icc_failures = check_icc_profiles(WatermarkApp.create_renderer(), specs['text-empty-color'])
+
+    failed = False
+    if golden:
+        mismatched = [case for case, digest in hashes.items() if golden.get(case) not in (None, digest)]
+        missing = [case for case in hashes if case not in golden]
+        print(f"golden: {len(hashes) - len(mismatched) - len(missing)} match, "
+              f"{len(mismatched)} mismatch, {len(missing)} not recorded")
+        for case in mismatched[:20]:
+            print(f"  MISMATCH {case}")
+        failed = bool(mismatched)
+    if args.update:
+        args.golden.write_text(json.dumps(hashes, indent=2, sort_keys=True), encoding='utf-8')
+        print(f"golden: wrote {len(hashes)} reference hashes to {args.golden}")
+
+    cases = len(inputs) * len(specs)
+    excepted = ", ".join(f"{count} {name}" for name, count in baseline_result['excepted'].items() if count)
+    print(f"baseline: {baseline_result['identical']} identical, {len(baseline_result['failed'])} failed "
+          f"of {cases} (excepted: {excepted or 'none'})")
+    for line in baseline_result['failed'][:20]:
+        print(f"  FAIL {line}")
+    failed = failed or bool(baseline_result['failed'])
+
+    print(f"icc-profile: {'ok' if not icc_failures else f'{len(icc_failures)} failed'}")
+    for line in icc_failures:
+        print(f"  FAIL {line}")
+    failed = failed or bool(icc_failures)
+
+    for name in paths:
+        result = results[name]
+        print(f"{name}: {result['identical']} identical, {result['within']} within tolerance, "
+              f"{len(result['failed'])} failed, {result['skipped']} skipped of {cases} (worst error {result['worst']})")
+        for line in result['failed'][:20]:
+            print(f"  FAIL {line}")
+        failed = failed or bool(result['failed'])
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
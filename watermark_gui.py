@@ -1,15 +1,1034 @@
+import time
+_IMPORT_START = time.perf_counter()
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, colorchooser, font
 from tkinter import scrolledtext
 import os
+import abc
 import json
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
-from PIL import Image, ImageDraw, ImageFont, ImageTk, ImageColor
+from typing import Callable, List, Dict, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from PIL import Image, ImageDraw, ImageFilter, ImageFont, ImageStat, ImageTk, ImageColor
 import threading
 import queue
+import math
 import re
+import sys
+import io
+import warnings
+
+_IMPORT_END = time.perf_counter()
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif', '.webp', '.gif'}
+# Multi-frame sources in these containers are watermarked frame by frame and keep their container
+ANIMATED_FORMATS = {'GIF', 'WEBP', 'TIFF'}
+# Anchors scored by the 'auto' position, and the long edge of the proxy they are scored on
+AUTO_POSITIONS = ['top-left', 'top-center', 'top-right', 'middle-left', 'center', 'middle-right',
+                  'bottom-left', 'bottom-center', 'bottom-right']
+AUTO_PROXY_EDGE = 128
+# Contact sheet tile edge on screen and in exported proof sheets
+CONTACT_TILE_SIZE = 144
+PROOF_TILE_SIZE = 280
+# Size of the synthetic image the dry-run planner times decode, watermark and encode on
+CALIBRATION_SIZE = (1024, 768)
+# Integer grayscale modes blended at full depth (values 0-65535)
+DEEP_GRAY_MODES = ('I', 'I;16', 'I;16L', 'I;16B')
+# Pillow major version whose private GIF and WebP encoder helpers FrameStreamWriter streams through
+STREAMING_PILLOW_MAJOR = 12
+OUTPUT_SUFFIXES = {'JPEG': ('.jpg', '.jpeg'), 'PNG': ('.png',), 'GIF': ('.gif',),
+                   'WEBP': ('.webp',), 'TIFF': ('.tiff', '.tif')}
+FONT_EXTENSIONS = {'.ttf', '.ttc', '.otf', '.otc'}
+# Common Latin and CJK families tried when the requested family is not installed
+FALLBACK_FONT_FAMILIES = ['Arial', 'DejaVu Sans', 'Liberation Sans', 'Helvetica', 'Calibri',
+                          'Microsoft YaHei', 'Noto Sans CJK SC', 'PingFang SC', 'SimHei', 'Verdana']
+
+
+def _to_8bit(image):
+    """8-bit grayscale copy of a 16/32-bit integer grayscale image (0-65535 scaled to 0-255);
+    other modes are returned unchanged"""
+    if image.mode in DEEP_GRAY_MODES:
+        return image.convert("I").point(lambda v: v * (1 / 257)).convert("L")
+    return image
+
+
+def _physical_memory_bytes() -> Optional[int]:
+    """Total physical memory, or None if it cannot be determined"""
+    try:
+        if os.name == 'nt':
+            import ctypes
+
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong),
+                            ('ullTotalPhys', ctypes.c_ulonglong), ('ullAvailPhys', ctypes.c_ulonglong),
+                            ('ullTotalPageFile', ctypes.c_ulonglong), ('ullAvailPageFile', ctypes.c_ulonglong),
+                            ('ullTotalVirtual', ctypes.c_ulonglong), ('ullAvailVirtual', ctypes.c_ulonglong),
+                            ('ullAvailExtendedVirtual', ctypes.c_ulonglong)]
+
+            status = MEMORYSTATUSEX()
+            status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+            ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status))
+            return int(status.ullTotalPhys)
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except Exception:
+        return None
+
+
+class MemoryBudget:
+    """Admit work only while the sum of reserved bytes fits within a budget.
+
+    A job larger than the whole budget waits until nothing else is running and
+    then runs alone, so oversized files are still processed without overlap."""
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.in_use = 0
+        self._cond = threading.Condition()
+
+    @staticmethod
+    def default_budget() -> int:
+        """Half of physical memory, or 2 GiB if that is unknown"""
+        total = _physical_memory_bytes()
+        return total // 2 if total else 2 * 1024 ** 3
+
+    def acquire(self, cost: int) -> int:
+        """Block until `cost` bytes fit; returns the amount actually reserved"""
+        with self._cond:
+            while True:
+                # The budget may change while waiting, see set_budget
+                granted = min(max(cost, 0), self.budget_bytes)
+                if not self.in_use or self.in_use + granted <= self.budget_bytes:
+                    break
+                self._cond.wait()
+            self.in_use += granted
+            return granted
+
+    def release(self, granted: int) -> None:
+        with self._cond:
+            self.in_use -= granted
+            self._cond.notify_all()
+
+    def set_budget(self, budget_bytes: int) -> None:
+        """Change the budget; reservations already granted are kept and waiting jobs re-check"""
+        with self._cond:
+            self.budget_bytes = budget_bytes
+            self._cond.notify_all()
+
+    @contextmanager
+    def reserve(self, cost: int):
+        granted = self.acquire(cost)
+        try:
+            yield
+        finally:
+            self.release(granted)
+
+
+class OutputSink(abc.ABC):
+    """Write-behind output stage.
+
+    Render workers hand over encoded buffers with `write` and continue immediately;
+    a single writer thread commits them in order. Pending buffers are capped by
+    `max_pending_bytes` so a slow destination applies back-pressure instead of
+    growing memory without bound."""
+
+    def __init__(self, max_pending_bytes: int = 256 * 1024 * 1024):
+        self._pending = MemoryBudget(max_pending_bytes)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._writer, daemon=True)
+        self._thread.start()
+
+    def write(self, name: str, data: bytes) -> Future:
+        """Queue `data` for `name` (a relative POSIX path); the future resolves to the committed location"""
+        future = Future()
+        granted = self._pending.acquire(len(data))
+        self._queue.put((name, data, granted, future))
+        return future
+
+    def _writer(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            name, data, granted, future = item
+            try:
+                future.set_result(self._commit(name, data))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self._pending.release(granted)
+
+    def close(self) -> None:
+        """Drain all pending writes and finalize the output"""
+        self._queue.put(None)
+        self._thread.join()
+        self._finish()
+
+    @abc.abstractmethod
+    def _commit(self, name: str, data: bytes):
+        """Store one file (runs on the writer thread) and return its committed location"""
+
+    def _finish(self) -> None:
+        pass
+
+
+class DirectorySink(OutputSink):
+    """Commit each file atomically: write a temp file next to it, fsync, then rename"""
+
+    def __init__(self, root, **kwargs):
+        self.root = Path(root)
+        super().__init__(**kwargs)
+
+    def _commit(self, name: str, data: bytes) -> Path:
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            raise
+        return path
+
+
+class ArchiveSink(OutputSink):
+    """Stream the whole batch into one ZIP or TAR archive, renamed into place on close"""
+
+    def __init__(self, archive_path, kind: str = 'zip', **kwargs):
+        self.archive_path = Path(archive_path)
+        self.archive_path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = self.archive_path.with_name(f".{self.archive_path.name}.{os.getpid()}.tmp")
+        self.kind = kind
+        if kind == 'zip':
+            import zipfile
+            # JPEG/PNG data is already compressed, so store entries as-is
+            self._archive = zipfile.ZipFile(self._tmp_path, 'w', compression=zipfile.ZIP_STORED, allowZip64=True)
+        else:
+            import tarfile
+            self._archive = tarfile.open(self._tmp_path, 'w')
+        super().__init__(**kwargs)
+
+    def _commit(self, name: str, data: bytes) -> str:
+        import tarfile, zipfile
+        if self.kind == 'zip':
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            self._archive.writestr(info, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self._archive.addfile(info, io.BytesIO(data))
+        return f"{self.archive_path.name}:{name}"
+
+    def _finish(self) -> None:
+        self._archive.close()
+        os.replace(self._tmp_path, self.archive_path)
+
+
+class FrameStreamWriter:
+    """Encode an animation or multi-page file one frame at a time.
+
+    Pillow's save_all collects every frame before writing, so a long animation
+    would hold all of its decoded frames at once. Here GIF frames are written
+    straight to `fp`, TIFF pages are appended as they come and WebP frames go
+    to the incremental WebP animation encoder; only encoded data accumulates.
+    GIF and WebP streaming uses Pillow's private encoder helpers, so on other
+    Pillow releases than STREAMING_PILLOW_MAJOR, or when the helpers are
+    missing, those frames are collected and written with save_all instead."""
+
+    def __init__(self, fp, container: str, loop: Optional[int] = None,
+                 lossless: bool = False, quality: int = 95):
+        self.fp = fp
+        self.container = container
+        self.loop = loop
+        self.lossless = lossless
+        self.quality = quality
+        self.frames = 0
+        self.streaming = self.streaming_supported(container)
+        self._buffered: List[Tuple[Image.Image, int, int]] = []
+        self._timestamp = 0
+        self._encoder = None
+        if container == "TIFF":
+            from PIL import TiffImagePlugin
+            self._encoder = TiffImagePlugin.AppendingTiffWriter(fp)
+
+    @staticmethod
+    def streaming_supported(container: str) -> bool:
+        """Whether `container` can be written frame by frame with the installed Pillow"""
+        if container == "TIFF":
+            return True
+        if int(Image.__version__.split('.')[0]) != STREAMING_PILLOW_MAJOR:
+            return False
+        if container == "GIF":
+            from PIL import GifImagePlugin
+            return hasattr(GifImagePlugin, '_get_global_header') and hasattr(GifImagePlugin, '_write_frame_data')
+        try:
+            from PIL import _webp
+        except ImportError:
+            return False
+        return hasattr(_webp, 'WebPAnimEncoder')
+
+    def add(self, frame, duration: int = 0, disposal: int = 0) -> None:
+        """Append an RGBA frame shown for `duration` ms (GIF/WebP) or a TIFF page in any mode"""
+        if not self.streaming:
+            # The caller may close `frame` once this returns
+            self._buffered.append((frame.copy(), duration, disposal))
+        elif self.container == "GIF":
+            self._add_gif(frame, duration, disposal)
+        elif self.container == "WEBP":
+            self._add_webp(frame, duration)
+        else:
+            self._add_tiff(frame)
+        self.frames += 1
+
+    def _add_gif(self, frame, duration: int, disposal: int) -> None:
+        from PIL import GifImagePlugin
+        alpha = frame.getchannel("A")
+        transparent = alpha.getextrema()[0] < 128
+        # Adaptive palette per frame; index 255 is kept free for transparency
+        paletted = frame.convert("RGB").convert("P", palette=Image.Palette.ADAPTIVE,
+                                                colors=255 if transparent else 256)
+        params = {'duration': duration, 'disposal': disposal, 'include_color_table': self.frames > 0}
+        if transparent:
+            paletted.paste(255, mask=alpha.point(lambda a: 255 if a < 128 else 0))
+            params['transparency'] = 255
+            # Frames are written fully composed, so the previous frame must not show through
+            if disposal < 2:
+                params['disposal'] = 2
+        if self.frames == 0:
+            paletted.info['version'] = b"89a"
+            for block in GifImagePlugin._get_global_header(paletted, {'loop': self.loop}):
+                self.fp.write(block)
+        GifImagePlugin._write_frame_data(self.fp, paletted, (0, 0), params)
+
+    def _add_webp(self, frame, duration: int) -> None:
+        if self._encoder is None:
+            from PIL import _webp
+            # Transparent background, keyframe spacing as in Pillow's save_all
+            self._encoder = _webp.WebPAnimEncoder(frame.size, 0, self.loop or 0, False,
+                                                  9 if self.lossless else 3, 17 if self.lossless else 5,
+                                                  False, False)
+        self._encoder.add(frame.getim(), round(self._timestamp), self.lossless, self.quality, 100, 0)
+        self._timestamp += duration
+
+    def _add_tiff(self, frame) -> None:
+        if frame.mode == "RGBA" and frame.getchannel("A").getextrema()[0] == 255:
+            frame = frame.convert("RGB")
+        frame.save(self._encoder, "TIFF", compression="tiff_lzw")
+        self._encoder.newFrame()
+
+    def _save_buffered(self) -> None:
+        frames = [frame for frame, _, _ in self._buffered]
+        params = {'save_all': True, 'append_images': frames[1:],
+                  'duration': [duration for _, duration, _ in self._buffered]}
+        if self.container == "GIF":
+            # Frames are fully composed, so transparent ones must clear the previous frame
+            params['disposal'] = [2 if frame.getchannel("A").getextrema()[0] < 128 and disposal < 2 else disposal
+                                  for frame, _, disposal in self._buffered]
+            if self.loop is not None:
+                params['loop'] = self.loop
+        else:
+            params.update(loop=self.loop or 0, lossless=self.lossless, quality=self.quality)
+        frames[0].save(self.fp, self.container, **params)
+        self._buffered = []
+
+    def close(self) -> None:
+        """Finish the container; no frames can be added afterwards"""
+        if not self.streaming:
+            if self._buffered:
+                self._save_buffered()
+        elif self.container == "GIF":
+            self.fp.write(b";")
+        elif self.container == "WEBP" and self._encoder is not None:
+            self._encoder.add(None, round(self._timestamp), self.lossless, self.quality, 100, 0)
+            data = self._encoder.assemble("", "", "")
+            if data is None:
+                raise OSError("WebP encoder returned no data")
+            self.fp.write(data)
+
+
+class ImagePyramid:
+    """Reduced-resolution pyramid over an image file for viewport rendering.
+
+    Level k holds the image at roughly 1/2**k scale. Reduced levels are decoded
+    with JPEG draft scaling where possible and cached; a viewport is resampled
+    from the smallest level that still has enough resolution. At full
+    resolution, files stored as many uncompressed tiles or strips (e.g. TIFF
+    scans) decode only the tiles under the viewport, and their reduced levels
+    are built a band of tiles at a time; other files fall back to a cached full
+    decode. Because their memory stays bounded, such TIFFs are opened even when
+    they are over Pillow's decompression-bomb pixel limit, as long as every
+    tile or strip is under it."""
+
+    def __init__(self, path, max_levels: int = 8):
+        self.path = path
+        self._large = False
+        try:
+            im = Image.open(path)
+        except Image.DecompressionBombError as error:
+            from PIL import TiffImagePlugin
+            # Opening the TIFF plugin directly skips the pixel limit check
+            try:
+                im = TiffImagePlugin.TiffImageFile(path)
+            except Exception:
+                raise error from None
+            if not self._region_decodable(im) or not self._tiles_within_limit(im):
+                im.close()
+                raise error
+            self._large = True
+        with im:
+            self.size = im.size
+            self.format = im.format
+            self._tiled = self._region_decodable(im)
+        self.max_levels = max_levels
+        self._levels: Dict[int, Image.Image] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _region_decodable(im) -> bool:
+        """Stored as several uncompressed tiles or strips whose pixels need nothing but the mode"""
+        return len(im.tile) > 1 and all(tile[0] == 'raw' for tile in im.tile) and im.mode not in ("P", "PA")
+
+    @staticmethod
+    def _tiles_within_limit(im) -> bool:
+        """Every tile or strip (its extent, i.e. width x rows per strip) is under the pixel limit"""
+        return all((x1 - x0) * (y1 - y0) <= Image.MAX_IMAGE_PIXELS for _, (x0, y0, x1, y1), _, _ in im.tile)
+
+    def open(self):
+        """Open the file without decoding it (also when it is a large TIFF, see above)"""
+        if self._large:
+            from PIL import TiffImagePlugin
+            return TiffImagePlugin.TiffImageFile(self.path)
+        return Image.open(self.path)
+
+    def level_for_scale(self, scale: float) -> int:
+        """Smallest level whose resolution is still at least `scale`"""
+        level = 0
+        while level < self.max_levels and scale <= 1 / 2 ** (level + 1) and min(self.size) >> (level + 1) > 0:
+            level += 1
+        return level
+
+    def level(self, k: int) -> Image.Image:
+        with self._lock:
+            cached = self._levels.get(k)
+            if cached is not None:
+                return cached
+            # Build from the nearest finer cached level instead of decoding again
+            finer = [level for level in self._levels if level < k]
+            if finer:
+                source_level = max(finer)
+                image = self._levels[source_level].reduce(2 ** (k - source_level))
+            else:
+                image = self._decode_level(k)
+            self._levels[k] = image
+            return image
+
+    @staticmethod
+    def _level_mode(image) -> Image.Image:
+        image = image if image.mode not in ("P", "1", "CMYK") else image.convert("RGBA")
+        return _to_8bit(image)
+
+    def _decode_level(self, k: int) -> Image.Image:
+        target = (max(1, self.size[0] >> k), max(1, self.size[1] >> k))
+        factor = self.size[0] // target[0]
+        if self._tiled:
+            return self._decode_level_in_bands(factor)
+        with self.open() as im:
+            if k and im.format == "JPEG":
+                im.draft(im.mode, target)
+            im.load()
+            image = self._level_mode(im)
+            factor = image.width // target[0]
+            if factor >= 2:
+                image = image.reduce(factor)
+            return image.copy() if image is im else image
+
+    def _decode_level_in_bands(self, factor: int) -> Image.Image:
+        """Reduce by `factor` one band of rows at a time; bands are whole reduction blocks high,
+        so the result matches reducing the full decode"""
+        width, height = self.size
+        band = max(factor, (64 * 1024 * 1024 // (width * 4)) // factor * factor)
+        level = None
+        for top in range(0, height, band):
+            bottom = min(height, top + band)
+            part, (_, origin_top) = self._decode_region((0, top, width, bottom))
+            part = self._level_mode(part.crop((0, top - origin_top, width, bottom - origin_top)))
+            if factor >= 2:
+                part = part.reduce(factor)
+            if level is None:
+                level = Image.new(part.mode, (part.width, -(-height // max(factor, 1))))
+            level.paste(part, (0, top // max(factor, 1)))
+        return level
+
+    @staticmethod
+    def _raw_bits(mode: str, rawmode: str) -> int:
+        """Bits per pixel of `rawmode` data"""
+        return len(Image.new(mode, (8, 1)).tobytes("raw", rawmode))
+
+    def _decode_region(self, box: Tuple[int, int, int, int]) -> Tuple[Image.Image, Tuple[int, int]]:
+        """Decode only the tiles intersecting `box`; returns the image and its source origin"""
+        x0, y0, x1, y1 = box
+        with self.open() as im:
+            mode = im.mode
+            tiles = [tile for tile in im.tile
+                     if tile[1][0] < x1 and tile[1][2] > x0 and tile[1][1] < y1 and tile[1][3] > y0]
+        left = min(tile[1][0] for tile in tiles)
+        top = min(tile[1][1] for tile in tiles)
+        right = max(tile[1][2] for tile in tiles)
+        bottom = max(tile[1][3] for tile in tiles)
+        # Decode into an image the size of the covered tiles rather than the whole frame
+        region = Image.new(mode, (right - left, bottom - top))
+        with open(self.path, 'rb') as f:
+            for _, extents, offset, args in tiles:
+                rawmode, stride, ystep = args if isinstance(args, tuple) else (args, 0, 1)
+                width, height = extents[2] - extents[0], extents[3] - extents[1]
+                stride = stride or -(-width * self._raw_bits(mode, rawmode) // 8)
+                f.seek(offset)
+                tile = Image.frombytes(mode, (width, height), f.read(stride * height), "raw", rawmode, stride, ystep)
+                region.paste(tile, (extents[0] - left, extents[1] - top))
+        return region, (left, top)
+
+    def region(self, box: Tuple[float, float, float, float], scale: float) -> Image.Image:
+        """Render source-pixel `box` at `scale` (output pixels per source pixel) as RGBA"""
+        x0, y0, x1, y1 = box
+        out_size = (max(1, round((x1 - x0) * scale)), max(1, round((y1 - y0) * scale)))
+        k = self.level_for_scale(scale)
+        if k == 0 and self._tiled:
+            image, (left, top) = self._decode_region((int(x0), int(y0), math.ceil(x1), math.ceil(y1)))
+            source_box = (x0 - left, y0 - top, x1 - left, y1 - top)
+        else:
+            image = self.level(k)
+            level_scale_x = image.width / self.size[0]
+            level_scale_y = image.height / self.size[1]
+            source_box = (x0 * level_scale_x, y0 * level_scale_y, x1 * level_scale_x, y1 * level_scale_y)
+        image = _to_8bit(image)
+        if image.mode not in ("RGB", "RGBA", "L", "LA"):
+            image = image.convert("RGBA")
+        if source_box == (0, 0, image.width, image.height) and out_size == image.size:
+            region = image.copy()
+        elif out_size == (round(source_box[2] - source_box[0]), round(source_box[3] - source_box[1])) \
+                and all(float(v).is_integer() for v in source_box):
+            region = image.crop(tuple(int(v) for v in source_box))
+        else:
+            region = image.resize(out_size, Image.Resampling.LANCZOS, box=source_box)
+        return region if region.mode == "RGBA" else region.convert("RGBA")
+
+
+def _user_cache_dir() -> Path:
+    """Per-user cache folder for persisted indexes"""
+    base = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME')
+    if base:
+        return Path(base) / 'PhotoWatermark'
+    if sys.platform == 'darwin':
+        return Path.home() / 'Library' / 'Caches' / 'PhotoWatermark'
+    return Path.home() / '.cache' / 'PhotoWatermark'
+
+
+class FontIndex:
+    """Persistent family -> font file map built from the standard font directories.
+
+    Family and style names are read from the font files themselves. The index is
+    saved per directory together with the directory mtime, so a later run only
+    re-reads directories that changed and lookups are a dict access."""
+
+    REGULAR_STYLES = ('regular', 'book', 'normal', 'roman', 'medium')
+    VERSION = 1
+
+    def __init__(self, cache_path=None, font_dirs: Optional[List[str]] = None):
+        self.cache_path = Path(cache_path) if cache_path else _user_cache_dir() / 'font_index.json'
+        self.font_dirs = font_dirs if font_dirs is not None else self.default_font_dirs()
+        self._dirs: Dict[str, dict] = {}
+        self._families: Dict[str, Tuple[str, int]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def default_font_dirs() -> List[str]:
+        """Standard system and per-user font directories for Windows, macOS and Linux"""
+        home = Path.home()
+        if os.name == 'nt':
+            windows_dir = os.environ.get('WINDIR', r'C:\\Windows')
+            dirs = [os.path.join(windows_dir, 'Fonts')]
+            local = os.environ.get('LOCALAPPDATA')
+            if local:
+                dirs.append(os.path.join(local, 'Microsoft', 'Windows', 'Fonts'))
+        elif sys.platform == 'darwin':
+            dirs = ['/System/Library/Fonts', '/Library/Fonts', str(home / 'Library' / 'Fonts')]
+        else:
+            data_home = os.environ.get('XDG_DATA_HOME') or str(home / '.local' / 'share')
+            dirs = ['/usr/share/fonts', '/usr/local/share/fonts',
+                    os.path.join(data_home, 'fonts'), str(home / '.fonts')]
+        return dirs
+
+    def _load_cache(self) -> Dict[str, dict]:
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION:
+                return data.get('dirs', {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Failed to load font index {self.cache_path}: {e}")
+        return {}
+
+    def _save_cache(self) -> None:
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.VERSION, 'dirs': self._dirs}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            print(f"Failed to save font index {self.cache_path}: {e}")
+
+    @staticmethod
+    def _read_faces(path: str) -> List[list]:
+        """Return [index, family, style] for every face in a font file (TTC holds several)"""
+        faces = []
+        index = 0
+        while True:
+            try:
+                family, style = ImageFont.truetype(path, 12, index=index).getname()
+            except Exception:
+                break
+            if family:
+                faces.append([index, family, style or ''])
+            if not path.lower().endswith(('.ttc', '.otc')):
+                break
+            index += 1
+        return faces
+
+    def _scan_dir(self, directory: str, cached: Dict[str, dict], visited: set) -> bool:
+        """Refresh one directory tree, reusing unchanged entries; returns True if anything changed.
+        `visited` holds the real paths already scanned, so symlinked directories are read once
+        and symlink loops end."""
+        real = os.path.realpath(directory)
+        if real in visited:
+            return False
+        visited.add(real)
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return directory in cached
+        entry = cached.get(directory)
+        changed = False
+        if not entry or entry['mtime'] != mtime:
+            fonts, subdirs = [], []
+            try:
+                with os.scandir(directory) as it:
+                    for item in it:
+                        if item.is_dir():
+                            subdirs.append(item.path)
+                        elif os.path.splitext(item.name)[1].lower() in FONT_EXTENSIONS:
+                            for face in self._read_faces(item.path):
+                                fonts.append([item.path] + face)
+            except OSError:
+                return directory in cached
+            entry = {'mtime': mtime, 'fonts': fonts, 'subdirs': subdirs}
+            changed = True
+        self._dirs[directory] = entry
+        for subdir in entry['subdirs']:
+            changed = self._scan_dir(subdir, cached, visited) or changed
+        return changed
+
+    def _build_families(self) -> None:
+        families: Dict[str, Tuple[str, int]] = {}
+        regular: Dict[str, Tuple[str, int]] = {}
+        for entry in self._dirs.values():
+            for path, index, family, style in entry['fonts']:
+                key = family.casefold()
+                families.setdefault(key, (path, index))
+                if style.casefold() in self.REGULAR_STYLES:
+                    regular.setdefault(key, (path, index))
+                # Also resolve "Family Style" names such as "Arial Bold"
+                if style:
+                    families.setdefault(f"{family} {style}".casefold(), (path, index))
+        families.update(regular)
+        self._families = families
+
+    def ensure_loaded(self) -> None:
+        """Load the persisted index and rescan only font directories that changed"""
+        with self._lock:
+            if self._loaded:
+                return
+            cached = self._load_cache()
+            self._dirs = {}
+            changed = False
+            visited = set()
+            for directory in self.font_dirs:
+                changed = self._scan_dir(directory, cached, visited) or changed
+            if changed or set(self._dirs) != set(cached):
+                self._save_cache()
+            self._build_families()
+            self._loaded = True
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def lookup(self, family: str) -> Optional[Tuple[str, int]]:
+        """Return (font file, face index) for a family name, or None (loads the index on first use)"""
+        if not family:
+            return None
+        self.ensure_loaded()
+        return self._families.get(family.casefold())
+
+    def families(self) -> List[str]:
+        """Sorted family names of all indexed fonts (loads the index on first use)"""
+        self.ensure_loaded()
+        return sorted({face[2] for entry in self._dirs.values() for face in entry['fonts']})
+
+
+class HotFolderWatcher:
+    """Watch a folder for new or changed images using a stat snapshot index.
+
+    Each poll lists only directories whose mtime changed and stats the known image
+    files. A file is handed to `process` once its (size, mtime) has been stable for
+    one full poll and at least `settle_time` seconds, so partially copied files are
+    never picked up. Processed signatures are journaled to avoid duplicate work
+    across restarts."""
+
+    def __init__(self, input_dir, process: Callable[[str], object], exclude_dirs=(),
+                 journal_path=None, interval: float = 1.0, settle_time: float = 2.0,
+                 max_workers: Optional[int] = None, on_processed: Optional[Callable[[str, bool], None]] = None):
+        self.input_dir = os.path.abspath(input_dir)
+        self.process = process
+        self.exclude_dirs = {self._norm(d) for d in exclude_dirs}
+        # An excluded (output) folder that is the watched folder or contains it would feed
+        # every output back in as a new input
+        watched = self._norm(self.input_dir)
+        for excluded in self.exclude_dirs:
+            if watched == excluded or watched.startswith(os.path.join(excluded, '')):
+                raise ValueError(f"the watched folder {self.input_dir} is inside the excluded folder {excluded}")
+        self.journal_path = Path(journal_path) if journal_path else None
+        self.interval = interval
+        self.settle_time = settle_time
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.on_processed = on_processed
+        self._dir_cache: Dict[str, Tuple[int, List[str], List[str]]] = {}
+        self._snapshot: Dict[str, Tuple[int, int]] = {}
+        self._processed: Dict[str, Tuple[int, int]] = self._load_journal()
+        self._in_flight = set()
+        self._journal_dirty = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._executor = None
+
+    @staticmethod
+    def _norm(path) -> str:
+        return os.path.normcase(os.path.abspath(str(path)))
+
+    def _load_journal(self) -> Dict[str, Tuple[int, int]]:
+        if not self.journal_path or not self.journal_path.exists():
+            return {}
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return {k: tuple(v) for k, v in data.items()}
+        except Exception as e:
+            print(f"Failed to load watch journal {self.journal_path}: {e}")
+            return {}
+
+    def _save_journal(self) -> None:
+        if not self.journal_path:
+            return
+        with self._lock:
+            if not self._journal_dirty:
+                return
+            data = {k: list(v) for k, v in self._processed.items()}
+            self._journal_dirty = False
+        try:
+            tmp_path = self.journal_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.journal_path)
+        except Exception as e:
+            print(f"Failed to save watch journal {self.journal_path}: {e}")
+
+    def scan(self) -> Dict[str, Tuple[int, int]]:
+        """Return a {path: (size, mtime_ns)} snapshot of all images under input_dir"""
+        snapshot = {}
+        dir_cache = {}
+        recent_ns = time.time_ns() - int(self.settle_time * 1e9)
+        pending = [self.input_dir]
+        while pending:
+            directory = pending.pop()
+            try:
+                dir_mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            cached = self._dir_cache.get(directory)
+            # Re-list if the directory changed, or changed so recently that coarse
+            # mtime resolution (FAT, SMB shares) could hide a second modification
+            if cached and cached[0] == dir_mtime and dir_mtime < recent_ns:
+                files, subdirs = cached[1], cached[2]
+            else:
+                files, subdirs = [], []
+                try:
+                    with os.scandir(directory) as it:
+                        for entry in it:
+                            if entry.is_dir(follow_symlinks=False):
+                                if self._norm(entry.path) not in self.exclude_dirs:
+                                    subdirs.append(entry.path)
+                            elif os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+                                files.append(entry.path)
+                except OSError:
+                    continue
+            dir_cache[directory] = (dir_mtime, files, subdirs)
+            pending.extend(subdirs)
+            for file_path in files:
+                try:
+                    st = os.stat(file_path)
+                except OSError:
+                    continue  # Removed between listing and stat
+                snapshot[file_path] = (st.st_size, st.st_mtime_ns)
+        self._dir_cache = dir_cache
+        return snapshot
+
+    def poll(self) -> List[str]:
+        """Scan once and return files that finished writing and still need processing"""
+        current = self.scan()
+        settled_ns = time.time_ns() - int(self.settle_time * 1e9)
+        ready = []
+        with self._lock:
+            for path, sig in current.items():
+                if path in self._in_flight or self._processed.get(path) == sig:
+                    continue
+                if self._snapshot.get(path) == sig and sig[1] <= settled_ns:
+                    ready.append(path)
+            # Forget files that were removed so the journal stays bounded
+            for path in [p for p in self._processed if p not in current]:
+                del self._processed[path]
+                self._journal_dirty = True
+        self._snapshot = current
+        return ready
+
+    def _run(self, path: str, sig: Tuple[int, int]) -> None:
+        ok = False
+        try:
+            self.process(path)
+            ok = True
+        except Exception as e:
+            print(f"Failed to process {path}: {e}")
+        with self._lock:
+            # Failed files are recorded too; they are retried once their content changes
+            self._processed[path] = sig
+            self._in_flight.discard(path)
+            self._journal_dirty = True
+        if self.on_processed:
+            self.on_processed(path, ok)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                for path in self.poll():
+                    with self._lock:
+                        self._in_flight.add(path)
+                    self._executor.submit(self._run, path, self._snapshot[path])
+                self._save_journal()
+            except Exception as e:
+                print(f"Watch poll failed: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        if self._executor:
+            self._executor.shutdown(wait=True)
+        self._save_journal()
+
+
+class BatchManifest:
+    """Batch export description that can be split across processes or machines.
+
+    A manifest lists the inputs (with a cost from their headers), the export
+    targets and a shared output folder. Shard i of n takes a stable,
+    size-balanced share of the inputs and records each result in its own
+    completion journal under `<output_dir>/.shards`; `merge` combines the
+    journals and reports inputs that failed or were never processed."""
+
+    def __init__(self, path):
+        self.path = Path(path).resolve()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        base = self.path.parent
+        self.inputs: List[dict] = [dict(item, path=str(base / item['path'])) for item in data['inputs']]
+        self.targets: List[dict] = data['targets']
+        self.output_dir = base / data.get('output_dir', 'output')
+        # Journals from an edited manifest with the same name must not count
+        import hashlib
+        content = json.dumps([data['inputs'], data['targets']], sort_keys=True)
+        self.digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    def create(path, images: List[str], targets: List[dict], output_dir) -> 'BatchManifest':
+        """Write a manifest for `images`; costs come from image headers (pixels times frames)"""
+        inputs = []
+        for image_path in images:
+            try:
+                with Image.open(image_path) as im:
+                    cost = im.size[0] * im.size[1] * getattr(im, 'n_frames', 1)
+            except Exception:
+                cost = os.path.getsize(image_path)
+            inputs.append({'path': os.path.abspath(image_path), 'cost': cost})
+        data = {'inputs': inputs, 'targets': targets, 'output_dir': os.path.abspath(output_dir)}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return BatchManifest(path)
+
+    def shard(self, index: int, count: int) -> List[str]:
+        """Inputs of shard `index` of `count`: largest first, each to the least loaded shard.
+        Every shard computes the same assignment from the manifest alone."""
+        if not 0 <= index < count:
+            raise ValueError(f"shard index {index} out of range for {count} shards")
+        loads = [0] * count
+        selected = []
+        for item in sorted(self.inputs, key=lambda item: (-item['cost'], item['path'])):
+            shard = loads.index(min(loads))
+            loads[shard] += item['cost']
+            if shard == index:
+                selected.append(item['path'])
+        return selected
+
+    def journal_path(self, index: int, count: int) -> Path:
+        return self.output_dir / ".shards" / f"{self.path.stem}.shard-{index}-of-{count}.json"
+
+    def _read_journal(self, path: Path) -> Optional[dict]:
+        """A shard journal written for this manifest, or None"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Failed to load shard journal {path}: {e}")
+            return None
+        return data if data.get('manifest') == self.digest else None
+
+    def load_journal(self, index: int, count: int) -> Dict[str, dict]:
+        """Per-input results recorded by a shard so far"""
+        data = self._read_journal(self.journal_path(index, count))
+        return data['files'] if data else {}
+
+    def save_journal(self, index: int, count: int, files: Dict[str, dict]) -> None:
+        path = self.journal_path(index, count)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'manifest': self.digest, 'shard': index, 'shards': count, 'files': files},
+                      f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def merge(self) -> dict:
+        """Combine all shard journals: the number of inputs done, failures with their errors,
+        inputs no shard recorded, and journals missing from a shard set"""
+        results: Dict[str, dict] = {}
+        found: Dict[int, set] = {}
+        for path in self.journal_path(0, 1).parent.glob(f"{self.path.stem}.shard-*-of-*.json"):
+            data = self._read_journal(path)
+            if data is None:
+                continue
+            found.setdefault(data['shards'], set()).add(data['shard'])
+            for image_path, entry in data['files'].items():
+                # A success from any run wins over failures from other runs
+                if results.get(image_path, {}).get('status') != 'done':
+                    results[image_path] = entry
+        report = {'total': len(self.inputs), 'done': 0, 'failed': {}, 'missing': [],
+                  'missing_journals': [self.journal_path(index, count).name
+                                       for count, indexes in sorted(found.items())
+                                       for index in range(count) if index not in indexes]}
+        for item in self.inputs:
+            entry = results.get(item['path'])
+            if entry is None:
+                report['missing'].append(item['path'])
+            elif entry['status'] == 'done':
+                report['done'] += 1
+            else:
+                report['failed'][item['path']] = entry.get('error', '')
+        return report
+
+
+def read_image_header(image_path) -> dict:
+    """Size, mode, format and frame count of an image, read from its header without decoding
+    pixel data. 'error' is set when an export of the file would fail; 'warnings' lists other problems."""
+    header = {'path': str(image_path), 'size': None, 'mode': None, 'format': None, 'frames': 1,
+              'file_bytes': 0, 'error': None, 'warnings': []}
+    try:
+        header['file_bytes'] = os.path.getsize(image_path)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', Image.DecompressionBombWarning)
+            with Image.open(image_path) as im:
+                # Frame counts of GIFs come from skipping over the frame data, not decoding it
+                frames = getattr(im, 'n_frames', 1) if im.format in ANIMATED_FORMATS else 1
+                header.update(size=im.size, mode=im.mode, format=im.format, frames=frames)
+    except Image.DecompressionBombError as e:
+        header['error'] = f"over the decompression limit: {e}"
+        return header
+    except Exception as e:
+        header['error'] = f"cannot be opened: {e}"
+        return header
+    if any(issubclass(w.category, Image.DecompressionBombWarning) for w in caught):
+        header['warnings'].append(f"{header['size'][0] * header['size'][1]} pixels is over the "
+                                  f"decompression warning limit of {Image.MAX_IMAGE_PIXELS}")
+    try:
+        Image.new(header['mode'], (1, 1)).convert("RGBA")
+    except Exception:
+        header['error'] = f"mode {header['mode']} cannot be watermarked"
+    return header
+
+
+def _format_bytes(count: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if count < 1024:
+            return f"{count:.0f} {unit}" if unit == 'B' else f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} TB"
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m {seconds:02d}s" if hours else f"{minutes}m {seconds:02d}s"
+
+
+def format_plan(plan: dict, limit: Optional[int] = None) -> str:
+    """Readable summary of a dry-run plan; `limit` caps the number of problems listed"""
+    files = plan['files']
+    readable = [item for item in files if not item['error']]
+    lines = [f"{len(files)} files ({len(readable)} readable, {sum(item['frames'] for item in readable)} frames), "
+             f"{plan['workers']} workers, memory budget {_format_bytes(plan['budget'])}",
+             f"Estimated time: {_format_duration(plan['seconds'])}",
+             f"Estimated peak memory: {_format_bytes(plan['peak_memory'])}",
+             f"Estimated output: {_format_bytes(plan['output_bytes'])}"]
+    for target in plan['targets']:
+        quality = f" q{target['quality']}" if target['format'] == "JPEG" else ""
+        lines.append(f"  {target['subfolder'] or '.'}/ {target['format']}{quality}: {_format_bytes(target['bytes'])}")
+    problems = [f"error: {item['path']}: {item['error']}" for item in files if item['error']]
+    problems += [f"warning: {item['path']}: {warning}" for item in files for warning in item['warnings']]
+    if problems:
+        lines.append(f"{len(problems)} problems:")
+        lines += [f"  {problem}" for problem in problems[:limit]]
+        if limit is not None and len(problems) > limit:
+            lines.append(f"  ... and {len(problems) - limit} more")
+    return "\n".join(lines)
+
 
 class WatermarkApp:
     def __init__(self, root):
@@ -18,6 +1037,35 @@ class WatermarkApp:
         self.root.geometry("1200x800")
         self.root.minsize(1000, 600)
         
+        self._init_state()
+        self._lazy_panels_built = False
+        self._startup_start = time.perf_counter()
+        self._startup_marks = []
+        self._startup_pending = 2  # idle steps and the font list, see _deferred_startup
+        
+        # Create the visible interface; fonts, templates and off-screen panels
+        # are filled in once the window is on screen
+        self.create_widgets()
+        self._mark_startup("visible widgets")
+        self._map_binding = self.root.bind('<Map>', self._on_first_map, add='+')
+    
+    def _on_first_map(self, event):
+        # Child widgets' <Map> events also reach the toplevel's bindings
+        if event.widget is not self.root:
+            return
+        self.root.unbind('<Map>', self._map_binding)
+        self._mark_startup("window shown")
+        self.root.after_idle(self._deferred_startup)
+        
+    @classmethod
+    def create_renderer(cls) -> 'WatermarkApp':
+        """Create an instance without any UI for rendering and exporting from explicit specs"""
+        app = cls.__new__(cls)
+        app.root = None
+        app._init_state()
+        return app
+        
+    def _init_state(self):
         # Application state
         self.images = []  # Store image path list
         self.current_image_index = 0
@@ -31,17 +1079,32 @@ class WatermarkApp:
             'rotation': 0,
             'image_path': None,
             'image_scale': 1.0,
-            'image_opacity': 80
+            'image_opacity': 80,
+            'custom_x': 0.5,
+            'custom_y': 0.5
         }
         self.templates = {}
         self.templates_dir = Path("templates")
         self.output_dir = None
         self.preview_image = None
         self.original_image = None
-        
-        # Create interface
-        self.create_widgets()
-        self.load_templates()
+        self._preview_base = None
+        self._viewport_base = None
+        self._preview_scale = 1.0
+        self._drag = None
+        self.pyramid = None
+        self._zoom = None  # None = fit to preview, else output pixels per source pixel
+        self._view_origin = (0, 0)
+        self._pan_start = None
+        self._resize_job = None
+        self.watcher = None
+        self.watch_sink = None
+        self.export_targets = []  # Extra export targets: {'spec', 'options', 'subfolder'}
+        self.font_index = FontIndex()
+        self.memory_budget = MemoryBudget(MemoryBudget.default_budget())
+        self._layer_cache = {}  # Rendered watermark layers, most recently used last
+        self._layer_cache_lock = threading.Lock()
+        self._sheet = None  # Open contact sheet window state
         
     def create_widgets(self):
         # Main frame
@@ -91,13 +1154,73 @@ class WatermarkApp:
         right_panel = ttk.Frame(main_frame)
         right_panel.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
         
+        # Export and template panels sit below the fold and are built lazily
+        self.left_panel = left_panel
         self.create_file_panel(left_panel)
         self.create_watermark_panel(left_panel)
-        self.create_export_panel(left_panel)
-        self.create_template_panel(left_panel)
         self.create_preview_panel(right_panel)
         
-    def _resolve_font_path(self, family_name: str) -> Optional[str]:
+    def _build_lazy_panels(self):
+        """Build panels that are not visible at startup (safe to call repeatedly)"""
+        if self._lazy_panels_built:
+            return
+        self._lazy_panels_built = True
+        self.create_export_panel(self.left_panel)
+        self.create_template_panel(self.left_panel)
+        
+    def _deferred_startup(self):
+        """Run the remaining startup work in small idle steps after the window appears"""
+        steps = [
+            ("lazy panels", self._build_lazy_panels),
+            ("templates", self.load_templates),
+        ]
+        # Build or validate the font file index and list its families off the UI thread
+        threading.Thread(target=self._load_font_list, daemon=True).start()
+        
+        def run_step(index=0):
+            if index >= len(steps):
+                self._startup_task_done()
+                return
+            label, step = steps[index]
+            step()
+            self._mark_startup(label)
+            self.root.after_idle(run_step, index + 1)
+        
+        run_step()
+        
+    def _mark_startup(self, label: str):
+        """Record a startup milestone (seconds since WatermarkApp was created)"""
+        self._startup_marks.append((label, time.perf_counter() - self._startup_start))
+    
+    def _startup_task_done(self):
+        self._startup_pending -= 1
+        if self._startup_pending == 0:
+            self._report_startup()
+        
+    def _report_startup(self):
+        """Print startup timings when WATERMARK_STARTUP_TIMING=1"""
+        if os.environ.get('WATERMARK_STARTUP_TIMING') != '1':
+            return
+        print(f"Startup: imports {(_IMPORT_END - _IMPORT_START) * 1000:.0f} ms")
+        for label, elapsed in self._startup_marks:
+            print(f"Startup: {label} at {elapsed * 1000:.0f} ms")
+        
+    def _resolve_font_path(self, family_name: str) -> Optional[Tuple[str, int]]:
+        """Resolve (font file, face index) for the given family from the font index. Until the
+        index has loaded in the background, the UI thread uses the Windows Fonts lookup instead
+        of waiting for it."""
+        try:
+            if not self.font_index.loaded and self.root is not None and \
+                    threading.current_thread() is threading.main_thread():
+                path = self._resolve_windows_font_path(family_name)
+                return (path, 0) if path else None
+            return self.font_index.lookup(family_name)
+        except Exception as e:
+            print(f"Font lookup failed for {family_name}: {e}")
+        return None
+
+    @staticmethod
+    def _resolve_windows_font_path(family_name: str) -> Optional[str]:
         """Resolve a usable TTF/TTC path for the given font family on Windows.
         Tries common filenames in the Windows Fonts directory and generic fallbacks."""
         try:
@@ -127,31 +1250,39 @@ class WatermarkApp:
             pass
         return None
 
-    def _get_truetype_font(self, size: int) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
-        """Get a scalable font. Try requested family, then Windows Fonts, then DejaVuSans, else default."""
-        family = None
-        try:
-            family = self.font_family.get()
-        except Exception:
-            family = 'Arial'
-        # 1) Try direct by family (works if Pillow can locate it)
-        try:
-            return ImageFont.truetype(family, size)
-        except Exception:
-            pass
-        # 2) Try resolve Windows font path
+    def _get_truetype_font(self, size: int, family: Optional[str] = None) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+        """Get a scalable font. Try the font index, then Pillow's own lookup, then common families, then DejaVuSans, else default."""
+        if family is None:
+            try:
+                family = self.font_family.get()
+            except Exception:
+                family = 'Arial'
+        # 1) Resolve family -> file through the font index
         resolved = self._resolve_font_path(family)
         if resolved:
             try:
-                return ImageFont.truetype(resolved, size)
+                return ImageFont.truetype(resolved[0], size, index=resolved[1])
             except Exception:
                 pass
-        # 3) Try DejaVuSans bundled with PIL
+        # 2) Try direct by family (works if Pillow can locate it)
+        try:
+            return ImageFont.truetype(family, size)
+        except Exception:
+            pass
+        # 3) Try common installed families
+        for fallback in FALLBACK_FONT_FAMILIES:
+            resolved = self._resolve_font_path(fallback)
+            if resolved:
+                try:
+                    return ImageFont.truetype(resolved[0], size, index=resolved[1])
+                except Exception:
+                    pass
+        # 4) Try DejaVuSans bundled with PIL
         try:
             return ImageFont.truetype('DejaVuSans.ttf', size)
         except Exception:
             pass
-        # 4) Fallback to small default bitmap font
+        # 5) Fallback to small default bitmap font
         return ImageFont.load_default()
 
     def create_file_panel(self, parent):
@@ -214,10 +1345,11 @@ class WatermarkApp:
         
         ttk.Label(font_frame, text="Font:").pack(side=tk.LEFT)
         self.font_family = tk.StringVar(value=self.watermark_config['font_family'])
-        font_combo = ttk.Combobox(font_frame, textvariable=self.font_family, width=15)
-        font_combo['values'] = self.get_system_fonts()
-        font_combo.pack(side=tk.LEFT, padx=(10, 5))
-        font_combo.bind('<<ComboboxSelected>>', self.on_font_change)
+        # Font families come from the font index once it has loaded in the background
+        self.font_combo = ttk.Combobox(font_frame, textvariable=self.font_family, width=15)
+        self.font_combo['values'] = [self.watermark_config['font_family']]
+        self.font_combo.pack(side=tk.LEFT, padx=(10, 5))
+        self.font_combo.bind('<<ComboboxSelected>>', self.on_font_change)
         
         ttk.Label(font_frame, text="Size:").pack(side=tk.LEFT, padx=(10, 0))
         self.font_size = tk.IntVar(value=self.watermark_config['font_size'])
@@ -290,6 +1422,10 @@ class WatermarkApp:
             row, col = i // 3, i % 3
             ttk.Radiobutton(grid_frame, text=text, variable=self.position_var, 
                            value=value, command=self.on_position_change).grid(row=row, column=col, padx=2, pady=2)
+        ttk.Radiobutton(grid_frame, text="Custom (drag on preview)", variable=self.position_var,
+                       value="custom", command=self.on_position_change).grid(row=3, column=0, columnspan=3, padx=2, pady=2, sticky=tk.W)
+        ttk.Radiobutton(grid_frame, text="Auto (least busy area per image)", variable=self.position_var,
+                       value="auto", command=self.on_position_change).grid(row=4, column=0, columnspan=3, padx=2, pady=2, sticky=tk.W)
         
         # Rotation settings
         rotation_frame = ttk.Frame(position_frame)
@@ -354,6 +1490,16 @@ class WatermarkApp:
         ttk.Radiobutton(format_frame, text="JPEG", variable=self.output_format, value="JPEG").pack(side=tk.LEFT, padx=(10, 0))
         ttk.Radiobutton(format_frame, text="PNG", variable=self.output_format, value="PNG").pack(side=tk.LEFT, padx=(10, 0))
         
+        # Output destination: individual files or a single archive
+        sink_frame = ttk.Frame(export_frame)
+        sink_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        ttk.Label(sink_frame, text="Write To:").pack(side=tk.LEFT)
+        self.output_sink = tk.StringVar(value="folder")
+        ttk.Radiobutton(sink_frame, text="Folder", variable=self.output_sink, value="folder").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Radiobutton(sink_frame, text="ZIP", variable=self.output_sink, value="zip").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Radiobutton(sink_frame, text="TAR", variable=self.output_sink, value="tar").pack(side=tk.LEFT, padx=(10, 0))
+        
         # JPEG quality settings
         quality_frame = ttk.Frame(export_frame)
         quality_frame.pack(fill=tk.X, pady=(0, 10))
@@ -363,11 +1509,57 @@ class WatermarkApp:
         quality_scale = ttk.Scale(quality_frame, from_=1, to=100, variable=self.quality, orient=tk.HORIZONTAL)
         quality_scale.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(10, 0))
         
+        # Output size (0 = keep source resolution)
+        resize_frame = ttk.Frame(export_frame)
+        resize_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        ttk.Label(resize_frame, text="Max Edge (px):").pack(side=tk.LEFT)
+        self.max_edge = tk.IntVar(value=0)
+        ttk.Spinbox(resize_frame, from_=0, to=20000, increment=256, textvariable=self.max_edge, width=8).pack(side=tk.LEFT, padx=(10, 0))
+        self.resize_mode = tk.StringVar(value="fit")
+        ttk.Radiobutton(resize_frame, text="Fit", variable=self.resize_mode, value="fit").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Radiobutton(resize_frame, text="Fill", variable=self.resize_mode, value="fill").pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Memory budget for concurrent export jobs (0 = half of physical memory)
+        budget_frame = ttk.Frame(export_frame)
+        budget_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        ttk.Label(budget_frame, text="Memory Budget (MB):").pack(side=tk.LEFT)
+        self.memory_budget_mb = tk.IntVar(value=0)
+        ttk.Spinbox(budget_frame, from_=0, to=1048576, increment=512, textvariable=self.memory_budget_mb, width=8).pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Label(budget_frame, text="0 = auto").pack(side=tk.LEFT, padx=(5, 0))
+        
+        # Export targets: each source is decoded once and written for every target
+        targets_frame = ttk.LabelFrame(export_frame, text="Export Targets", padding=5)
+        targets_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        target_btn_frame = ttk.Frame(targets_frame)
+        target_btn_frame.pack(fill=tk.X)
+        ttk.Label(target_btn_frame, text="Subfolder:").pack(side=tk.LEFT)
+        self.subfolder_var = tk.StringVar()
+        ttk.Entry(target_btn_frame, textvariable=self.subfolder_var, width=12).pack(side=tk.LEFT, padx=(5, 5))
+        ttk.Button(target_btn_frame, text="Add Current", command=self.add_export_target).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(target_btn_frame, text="Remove", command=self.remove_export_target).pack(side=tk.LEFT)
+        
+        self.target_listbox = tk.Listbox(targets_frame, height=4)
+        self.target_listbox.pack(fill=tk.X, pady=(5, 0))
+        
         # Export button
         export_btn_frame = ttk.Frame(export_frame)
         export_btn_frame.pack(fill=tk.X)
         
         ttk.Button(export_btn_frame, text="Start Export", command=self.start_export).pack(fill=tk.X)
+        ttk.Button(export_btn_frame, text="Dry Run (Estimate)", command=self.start_dry_run).pack(fill=tk.X, pady=(5, 0))
+        ttk.Button(export_btn_frame, text="Save Batch Manifest...", command=self.save_manifest).pack(fill=tk.X, pady=(5, 0))
+        
+        # Hot-folder watch mode
+        watch_frame = ttk.Frame(export_frame)
+        watch_frame.pack(fill=tk.X, pady=(10, 0))
+        
+        self.watch_button = ttk.Button(watch_frame, text="Start Watch Folder", command=self.toggle_watch)
+        self.watch_button.pack(side=tk.LEFT)
+        self.watch_status_var = tk.StringVar(value="Watch: stopped")
+        ttk.Label(watch_frame, textvariable=self.watch_status_var).pack(side=tk.LEFT, padx=(10, 0))
         
     def create_template_panel(self, parent):
         # Template management panel
@@ -407,12 +1599,31 @@ class WatermarkApp:
         self.preview_canvas = tk.Canvas(canvas_frame, bg='white', relief=tk.SUNKEN, bd=1)
         self.preview_canvas.pack(fill=tk.BOTH, expand=True)
         
+        # Drag the watermark to place it; corner handle scales, top handle rotates
+        self.preview_canvas.bind('<ButtonPress-1>', self.on_preview_press)
+        self.preview_canvas.bind('<B1-Motion>', self.on_preview_drag)
+        self.preview_canvas.bind('<ButtonRelease-1>', self.on_preview_release)
+        # Pan with the right or middle mouse button when zoomed in
+        for button in (2, 3):
+            self.preview_canvas.bind(f'<ButtonPress-{button}>', self.on_pan_press)
+            self.preview_canvas.bind(f'<B{button}-Motion>', self.on_pan_drag)
+            self.preview_canvas.bind(f'<ButtonRelease-{button}>', self.on_pan_release)
+        self.preview_canvas.bind('<Configure>', self.on_preview_resize)
+        
         # Preview controls
         control_frame = ttk.Frame(preview_frame)
         control_frame.pack(fill=tk.X, pady=(10, 0))
         
         ttk.Button(control_frame, text="Previous", command=self.prev_image).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(control_frame, text="Next", command=self.next_image).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(control_frame, text="Contact Sheet", command=self.open_contact_sheet).pack(side=tk.LEFT, padx=(0, 5))
+        
+        ttk.Label(control_frame, text="Zoom:").pack(side=tk.LEFT, padx=(10, 0))
+        self.zoom_var = tk.StringVar(value="Fit")
+        zoom_combo = ttk.Combobox(control_frame, textvariable=self.zoom_var, values=["Fit", "25%", "50%", "100%"],
+                                  width=5, state='readonly')
+        zoom_combo.pack(side=tk.LEFT, padx=(5, 0))
+        zoom_combo.bind('<<ComboboxSelected>>', self.on_zoom_change)
         
         self.image_info_label = ttk.Label(control_frame, text="Please select images")
         self.image_info_label.pack(side=tk.LEFT, padx=(20, 0))
@@ -421,17 +1632,28 @@ class WatermarkApp:
         self.progress = ttk.Progressbar(control_frame, mode='indeterminate')
         self.progress.pack(side=tk.RIGHT, fill=tk.X, expand=True, padx=(20, 0))
         
+    def _load_font_list(self):
+        """Background thread: load the font index, then fill the font dropdown on the UI thread"""
+        fonts = self.get_system_fonts()
+        self.root.after(0, self._set_font_list, fonts)
+    
+    def _set_font_list(self, fonts):
+        self.font_combo['values'] = fonts
+        self._mark_startup("fonts")
+        self._startup_task_done()
+    
     def get_system_fonts(self):
-        """Get system font list"""
+        """Get system font list from the font index (loads it on first use)"""
         try:
-            import tkinter.font as tkFont
-            fonts = list(tkFont.families())
+            fonts = self.font_index.families()
             # Filter common fonts
             common_fonts = ['Arial', 'Calibri', 'Microsoft YaHei', 'SimHei', 'SimSun', 'Times New Roman', 'Courier New']
             available_fonts = [f for f in common_fonts if f in fonts]
-            return available_fonts + [f for f in fonts if f not in common_fonts][:20]
-        except:
-            return ['Arial', 'Calibri', 'Microsoft YaHei', 'SimHei', 'SimSun']
+            if fonts:
+                return available_fonts + [f for f in fonts if f not in common_fonts][:20]
+        except Exception as e:
+            print(f"Failed to list fonts: {e}")
+        return ['Arial', 'Calibri', 'Microsoft YaHei', 'SimHei', 'SimSun']
     
     def select_images(self):
         """Select image files"""
@@ -439,11 +1661,12 @@ class WatermarkApp:
         if self.images:
             self.clear_images()
         filetypes = [
-            ('Image Files', '*.jpg *.jpeg *.png *.bmp *.tiff *.webp'),
+            ('Image Files', '*.jpg *.jpeg *.png *.bmp *.tiff *.tif *.webp *.gif'),
             ('JPEG Files', '*.jpg *.jpeg'),
             ('PNG Files', '*.png'),
             ('BMP Files', '*.bmp'),
-            ('TIFF Files', '*.tiff'),
+            ('TIFF Files', '*.tiff *.tif'),
+            ('GIF Files', '*.gif'),
             ('All Files', '*.*')
         ]
         
@@ -473,11 +1696,10 @@ class WatermarkApp:
         folder = filedialog.askdirectory(title="Select Image Folder")
         if folder:
             folder_path = Path(folder)
-            image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp'}
             
             prev_empty = len(self.images) == 0
             for file_path in folder_path.rglob('*'):
-                if file_path.suffix.lower() in image_extensions:
+                if file_path.suffix.lower() in IMAGE_EXTENSIONS:
                     self.images.append(str(file_path))
             
             self.update_image_list()
@@ -493,6 +1715,9 @@ class WatermarkApp:
     def clear_images(self):
         """Clear image list"""
         self.images.clear()
+        self.original_image = None
+        self.pyramid = None
+        self._preview_base = None
         self.image_listbox.delete(0, tk.END)
         self.preview_canvas.delete("all")
         self.image_info_label.config(text="Please select images")
@@ -525,13 +1750,17 @@ class WatermarkApp:
         
         try:
             image_path = self.images[self.current_image_index]
-            self.original_image = Image.open(image_path)
+            self.pyramid = ImagePyramid(image_path)
+            self.original_image = self.pyramid.open()
+            self._view_origin = (0, 0)
             self.update_preview()
             
             # Update image info
             filename = Path(image_path).name
             size = self.original_image.size
-            self.image_info_label.config(text=f"{filename} ({size[0]}x{size[1]})")
+            frames = getattr(self.original_image, 'n_frames', 1)
+            frame_info = f", {frames} frames" if frames > 1 else ""
+            self.image_info_label.config(text=f"{filename} ({size[0]}x{size[1]}{frame_info})")
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load image: {e}")
@@ -542,11 +1771,14 @@ class WatermarkApp:
             return
         
         try:
-            # Create watermarked image
-            watermarked_image = self.apply_watermark(self.original_image.copy())
+            # Decode only the visible viewport, from the smallest sufficient pyramid level
+            spec = self._collect_template()
+            scale, box = self._preview_viewport()
+            self._viewport_base = self.pyramid.region(box, scale)
+            self._preview_base = None
             
-            # Resize for preview
-            preview_image = self.resize_for_preview(watermarked_image)
+            # Composite the watermark into the viewport only
+            preview_image = self._composite_viewport(self._viewport_base, box, scale, spec)
             
             # Convert to Tkinter format
             self.preview_image = ImageTk.PhotoImage(preview_image)
@@ -554,61 +1786,366 @@ class WatermarkApp:
             # Clear canvas and display image
             self.preview_canvas.delete("all")
             self.preview_canvas.create_image(0, 0, anchor=tk.NW, image=self.preview_image)
+            self._draw_watermark_handles(spec)
             
         except Exception as e:
             messagebox.showerror("Error", f"Preview update failed: {e}")
     
-    def resize_for_preview(self, image, max_size=(800, 600)):
-        """Resize image for preview"""
-        img_width, img_height = image.size
-        max_width, max_height = max_size
-        
-        # Calculate scale ratio
-        scale = min(max_width / img_width, max_height / img_height)
+    def _preview_viewport(self) -> Tuple[float, Tuple[float, float, float, float]]:
+        """Return (scale, source box) for the preview: whole image when fitting, else the canvas viewport"""
+        img_width, img_height = self.original_image.size
+        if self._zoom is None:
+            # Fit within 800x600, never enlarging
+            scale = min(800 / img_width, 600 / img_height, 1.0)
+            self._view_origin = (0, 0)
+            self._preview_scale = scale
+            return scale, (0, 0, img_width, img_height)
+        
+        scale = self._zoom
+        canvas_w = self.preview_canvas.winfo_width()
+        canvas_h = self.preview_canvas.winfo_height()
+        if canvas_w <= 1 or canvas_h <= 1:
+            canvas_w, canvas_h = 800, 600
+        view_w = min(img_width, canvas_w / scale)
+        view_h = min(img_height, canvas_h / scale)
+        # Keep the viewport inside the image
+        x0 = min(max(0, self._view_origin[0]), img_width - view_w)
+        y0 = min(max(0, self._view_origin[1]), img_height - view_h)
+        # Align to whole source pixels at 1:1 so the preview is pixel-exact
+        if scale >= 1:
+            x0, y0 = int(x0), int(y0)
+            view_w, view_h = int(view_w), int(view_h)
+        self._view_origin = (x0, y0)
+        self._preview_scale = scale
+        return scale, (x0, y0, x0 + view_w, y0 + view_h)
+    
+    def _composite_viewport(self, base, box, scale: float, spec: dict):
+        """Composite the watermark onto a viewport image rendered from source `box` at `scale`"""
+        if spec['watermark_type'] != "text" and not spec['image_path']:
+            return base
+        try:
+            layer = self.render_watermark_layer(spec)
+        except Exception as e:
+            print(f"Failed to render watermark: {e}")
+            return base
+        x, y = self.get_watermark_position(self.original_image.size, layer.size, self._preview_position(spec, layer),
+                                           self._custom_center(spec))
+        if scale != 1:
+            size = (max(1, round(layer.width * scale)), max(1, round(layer.height * scale)))
+            layer = layer.resize(size, Image.Resampling.LANCZOS)
+        position = (round((x - box[0]) * scale), round((y - box[1]) * scale))
+        overlay = Image.new("RGBA", base.size, (0, 0, 0, 0))
+        overlay.paste(layer, position, layer)
+        return Image.alpha_composite(base, overlay)
+    
+    def on_zoom_change(self, event=None):
+        """Zoom level changed; keep the current view centre"""
+        if not self.original_image:
+            return
+        old_scale, old_box = self._preview_viewport()
+        center = ((old_box[0] + old_box[2]) / 2, (old_box[1] + old_box[3]) / 2)
+        value = self.zoom_var.get()
+        self._zoom = None if value == "Fit" else int(value.rstrip('%')) / 100
+        if self._zoom is not None:
+            canvas_w = max(self.preview_canvas.winfo_width(), 2)
+            canvas_h = max(self.preview_canvas.winfo_height(), 2)
+            self._view_origin = (center[0] - canvas_w / self._zoom / 2, center[1] - canvas_h / self._zoom / 2)
+        self.update_preview()
+    
+    def on_pan_press(self, event):
+        self._pan_start = (event.x, event.y, event.x, event.y)
+    
+    def on_pan_drag(self, event):
+        """Move the rendered viewport; the newly exposed area is rendered on release"""
+        if not self._pan_start or self._zoom is None:
+            return
+        start_x, start_y, last_x, last_y = self._pan_start
+        self.preview_canvas.move("all", event.x - last_x, event.y - last_y)
+        self._pan_start = (start_x, start_y, event.x, event.y)
+    
+    def on_pan_release(self, event):
+        if not self._pan_start or self._zoom is None:
+            self._pan_start = None
+            return
+        start_x, start_y, _, _ = self._pan_start
+        self._pan_start = None
+        self._view_origin = (self._view_origin[0] - (event.x - start_x) / self._zoom,
+                             self._view_origin[1] - (event.y - start_y) / self._zoom)
+        self.update_preview()
+    
+    def on_preview_resize(self, event):
+        """Re-render the viewport when the canvas size changes while zoomed"""
+        if self._zoom is None or not self.original_image:
+            return
+        if self._resize_job:
+            self.root.after_cancel(self._resize_job)
+        self._resize_job = self.root.after(150, self.update_preview)
+    
+    def _watermark_preview_box(self, spec: dict) -> Optional[Tuple[float, float, float, float]]:
+        """Watermark bounds (x0, y0, x1, y1) in preview canvas coordinates"""
+        if spec['watermark_type'] != "text" and not spec['image_path']:
+            return None
+        try:
+            layer = self.render_watermark_layer(spec)
+        except Exception:
+            return None
+        x, y = self.get_watermark_position(self.original_image.size, layer.size, self._preview_position(spec, layer),
+                                           self._custom_center(spec))
+        scale = self._preview_scale
+        x -= self._view_origin[0]
+        y -= self._view_origin[1]
+        return (x * scale, y * scale, (x + layer.width) * scale, (y + layer.height) * scale)
+    
+    def _draw_watermark_handles(self, spec: dict):
+        """Draw the drag box, scale handle (corner) and rotation handle (top) over the watermark"""
+        box = self._watermark_preview_box(spec)
+        if not box:
+            return
+        x0, y0, x1, y1 = box
+        center_x = (x0 + x1) / 2
+        r = 5
+        canvas = self.preview_canvas
+        canvas.create_rectangle(x0, y0, x1, y1, outline="#3399FF", dash=(4, 2), tags=("wm_handle", "wm_box"))
+        canvas.create_oval(x1 - r, y1 - r, x1 + r, y1 + r, fill="#3399FF", outline="white", tags=("wm_handle", "wm_scale"))
+        canvas.create_line(center_x, y0, center_x, y0 - 20, fill="#3399FF", tags=("wm_handle",))
+        canvas.create_oval(center_x - r, y0 - 20 - r, center_x + r, y0 - 20 + r, fill="#FF9933", outline="white",
+                           tags=("wm_handle", "wm_rotate"))
+    
+    def _preview_base_photo(self):
+        """Watermark-free preview of the current viewport, cached until the viewport is re-rendered"""
+        if self._preview_base is None:
+            self._preview_base = ImageTk.PhotoImage(self._viewport_base)
+        return self._preview_base
+    
+    def on_preview_press(self, event):
+        """Start moving, scaling or rotating the watermark on the preview"""
+        if not self.original_image:
+            return
+        spec = self._collect_template()
+        box = self._watermark_preview_box(spec)
+        if not box:
+            return
+        tags = set()
+        for item in self.preview_canvas.find_overlapping(event.x - 3, event.y - 3, event.x + 3, event.y + 3):
+            tags.update(self.preview_canvas.gettags(item))
+        x0, y0, x1, y1 = box
+        if "wm_scale" in tags:
+            mode = "scale"
+        elif "wm_rotate" in tags:
+            mode = "rotate"
+        elif x0 <= event.x <= x1 and y0 <= event.y <= y1:
+            mode = "move"
+        else:
+            return
         
-        if scale < 1:
-            new_width = int(img_width * scale)
-            new_height = int(img_height * scale)
-            return image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        # Pre-render the watermark once at preview scale; during the drag only this
+        # canvas item moves over the cached base image
+        layer = self.render_watermark_layer(spec)
+        size = (max(1, round(layer.width * self._preview_scale)), max(1, round(layer.height * self._preview_scale)))
+        preview_layer = layer.resize(size, Image.Resampling.LANCZOS)
+        center = ((x0 + x1) / 2, (y0 + y1) / 2)
+        self._drag = {'mode': mode, 'start': (event.x, event.y), 'center': center,
+                      'layer': preview_layer, 'offset': (0, 0), 'factor': 1.0, 'angle': 0.0}
+        self._drag_photo = ImageTk.PhotoImage(preview_layer)
+        
+        canvas = self.preview_canvas
+        canvas.delete("all")
+        canvas.create_image(0, 0, anchor=tk.NW, image=self._preview_base_photo())
+        canvas.create_image(center[0], center[1], anchor=tk.CENTER, image=self._drag_photo, tags=("wm_drag",))
+    
+    def on_preview_drag(self, event):
+        """Update the floating watermark item only"""
+        drag = self._drag
+        if not drag:
+            return
+        center_x, center_y = drag['center']
+        start_x, start_y = drag['start']
+        if drag['mode'] == "move":
+            drag['offset'] = (event.x - start_x, event.y - start_y)
+            self.preview_canvas.coords("wm_drag", center_x + drag['offset'][0], center_y + drag['offset'][1])
+            return
         
-        return image
+        if drag['mode'] == "scale":
+            start_dist = max(1.0, math.hypot(start_x - center_x, start_y - center_y))
+            drag['factor'] = max(0.05, math.hypot(event.x - center_x, event.y - center_y) / start_dist)
+            layer = drag['layer']
+            size = (max(1, round(layer.width * drag['factor'])), max(1, round(layer.height * drag['factor'])))
+            floating = layer.resize(size, Image.Resampling.BILINEAR)
+        else:
+            # Canvas y grows downwards, so a counter-clockwise drag is a positive angle
+            start_angle = math.atan2(center_y - start_y, start_x - center_x)
+            angle = math.atan2(center_y - event.y, event.x - center_x)
+            drag['angle'] = math.degrees(angle - start_angle)
+            floating = drag['layer'].rotate(drag['angle'], expand=True, resample=Image.Resampling.BILINEAR)
+        self._drag_photo = ImageTk.PhotoImage(floating)
+        self.preview_canvas.itemconfig("wm_drag", image=self._drag_photo)
     
-    def apply_watermark(self, image):
-        """Apply watermark to image"""
-        if self.watermark_type.get() == "text":
-            return self.apply_text_watermark(image)
+    def on_preview_release(self, event):
+        """Commit the drag to the settings and run the full composite once"""
+        drag = self._drag
+        if not drag:
+            return
+        self._drag = None
+        if drag['mode'] == "move":
+            # Canvas -> source pixels -> relative coordinates
+            source_x = (drag['center'][0] + drag['offset'][0]) / self._preview_scale + self._view_origin[0]
+            source_y = (drag['center'][1] + drag['offset'][1]) / self._preview_scale + self._view_origin[1]
+            self.watermark_config['custom_x'] = source_x / self.original_image.width
+            self.watermark_config['custom_y'] = source_y / self.original_image.height
+            self.position_var.set("custom")
+            self.watermark_config['position'] = "custom"
+        elif drag['mode'] == "scale":
+            if self.watermark_type.get() == "text":
+                self.font_size.set(max(8, min(200, round(self.font_size.get() * drag['factor']))))
+                self.watermark_config['font_size'] = self.font_size.get()
+            else:
+                self.image_scale.set(max(0.1, min(2.0, self.image_scale.get() * drag['factor'])))
+                self.watermark_config['image_scale'] = self.image_scale.get()
         else:
-            return self.apply_image_watermark(image)
+            angle = round(self.rotation.get() + drag['angle'])
+            self.rotation.set((angle + 180) % 360 - 180)
+            self.watermark_config['rotation'] = self.rotation.get()
+        self.update_preview()
     
-    def apply_text_watermark(self, image):
+    def apply_watermark(self, image, spec: Optional[dict] = None):
+        """Apply watermark to image using `spec` (a template dict) or the current UI settings"""
+        if spec is None:
+            spec = self._collect_template()
+        if spec['watermark_type'] == "text":
+            return self.apply_text_watermark(image, spec)
+        else:
+            return self.apply_image_watermark(image, spec)
+    
+    def apply_text_watermark(self, image, spec: Optional[dict] = None):
         """Apply text watermark"""
-        if image.mode != "RGBA":
-            image = image.convert("RGBA")
+        if spec is None:
+            spec = self._collect_template()
         
-        # Create base transparent overlay sized to the image
-        overlay = Image.new("RGBA", image.size, (0, 0, 0, 0))
+        text_layer = self.render_watermark_layer(spec)
+        return self._composite_layer(image, text_layer, spec)
+    
+    def apply_image_watermark(self, image, spec: Optional[dict] = None):
+        """Apply image watermark"""
+        if spec is None:
+            spec = self._collect_template()
+        if not spec['image_path']:
+            return image
         
+        try:
+            watermark_img = self.render_watermark_layer(spec)
+            return self._composite_layer(image, watermark_img, spec)
+            
+        except Exception as e:
+            if self.root is None:
+                print(f"Failed to apply image watermark: {e}")
+            else:
+                messagebox.showerror("Error", f"Failed to apply image watermark: {e}")
+            return image
+    
+    def _composite_layer(self, image, layer, spec: dict):
+        """Composite a rendered watermark layer onto a copy of image at the spec's position"""
+        # Compute position based on rotated size
+        anchor = self.auto_position(image, layer) if spec['position'] == "auto" else spec['position']
+        position = self.get_watermark_position(image.size, layer.size, anchor, self._custom_center(spec))
+        return self.composite_in_mode(image, layer, position)
+    
+    def composite_in_mode(self, image, layer, position):
+        """Blend an RGBA layer at `position` onto a copy of image, keeping the image's mode.
+        Only the region under the layer is converted: RGB, L and LA round-trip through RGBA,
+        CMYK blends per ink channel, 16-bit grayscale blends at full depth and P maps the
+        blended pixels back onto its own palette. Other modes are converted to RGBA."""
+        mode = image.mode
+        if mode not in ("RGBA", "RGB", "L", "LA", "CMYK", "P") + DEEP_GRAY_MODES or \
+                (mode == "P" and image.palette.mode != "RGB"):
+            overlay = Image.new("RGBA", image.size, (0, 0, 0, 0))
+            overlay.paste(layer, position, layer)
+            return Image.alpha_composite(image.convert("RGBA"), overlay)
+        
+        result = image.copy()
+        x, y = position
+        box = (max(0, x), max(0, y), min(image.width, x + layer.width), min(image.height, y + layer.height))
+        if box[0] >= box[2] or box[1] >= box[3]:
+            return result
+        # Same self-masked paste onto transparency as the full-frame overlay, so the mark looks identical
+        cropped = layer.crop((box[0] - x, box[1] - y, box[2] - x, box[3] - y))
+        part = Image.new("RGBA", cropped.size, (0, 0, 0, 0))
+        part.paste(cropped, (0, 0), cropped)
+        
+        if mode == "RGBA":
+            result.alpha_composite(part, box[:2])
+        elif mode in ("RGB", "L", "LA"):
+            region = result.crop(box).convert("RGBA")
+            region.alpha_composite(part)
+            result.paste(region.convert(mode), box[:2])
+        elif mode == "CMYK":
+            # Linear blend in ink space; the mark's colour uses Pillow's plain RGB to CMYK conversion
+            result.paste(part.convert("CMYK"), box[:2], part.getchannel("A"))
+        elif mode == "P":
+            region = result.crop(box).convert("RGBA")
+            region.alpha_composite(part)
+            remapped = region.convert("RGB").quantize(palette=image, dither=Image.Dither.NONE)
+            # Pixels the mark does not touch keep their index, and with it any transparency
+            result.paste(remapped, box[:2], part.getchannel("A").point(lambda a: 255 if a else 0))
+        else:
+            from PIL import ImageMath
+            # Masked paste blends 16-bit pixels byte by byte, so blend in 32-bit integers
+            alpha = part.getchannel("A").convert("I")
+            mark = part.convert("L").convert("I").point(lambda v: v * 257)
+            blended = ImageMath.lambda_eval(
+                lambda args: (args['base'] * (255 - args['alpha']) + args['mark'] * args['alpha'] + 127) / 255,
+                base=result.crop(box).convert("I"), mark=mark, alpha=alpha)
+            result.paste(blended.convert(mode), box[:2])
+        return result
+    
+    def _layer_cache_key(self, spec: dict) -> tuple:
+        if spec['watermark_type'] == "text":
+            text = spec['text']
+            if not text or text.strip() == "":
+                # Date/time fallback text changes every minute
+                text = datetime.now().strftime("%Y-%m-%d %H:%M")
+            # Layers drawn before the font index loaded may use a fallback font
+            return ("text", text, spec['font_family'], spec['font_size'], spec['color'],
+                    spec['opacity'], spec.get('rotation', 0), self.font_index.loaded)
+        path = spec['image_path']
+        return ("image", path, os.path.getmtime(path), spec['image_scale'],
+                spec['image_opacity'], spec.get('rotation', 0))
+    
+    def render_watermark_layer(self, spec: dict):
+        """Render the rotated watermark layer for a spec (cached; callers must not modify it)"""
+        key = self._layer_cache_key(spec)
+        with self._layer_cache_lock:
+            layer = self._layer_cache.pop(key, None)
+            if layer is not None:
+                # Re-insert to keep the most recently used entries
+                self._layer_cache[key] = layer
+                return layer
+        if spec['watermark_type'] == "text":
+            layer = self._render_text_layer(spec, key[1])
+        else:
+            layer = self._render_image_layer(spec)
+        with self._layer_cache_lock:
+            self._layer_cache[key] = layer
+            while len(self._layer_cache) > 8:
+                del self._layer_cache[next(iter(self._layer_cache))]
+        return layer
+    
+    def _render_text_layer(self, spec: dict, text: str):
         # Get font (robust TrueType fallback so watermark is visible)
-        font = self._get_truetype_font(self.font_size.get())
-        
-        # Get text (fallback to current date/time if empty)
-        text = self.text_entry.get()
-        if not text or text.strip() == "":
-            text = datetime.now().strftime("%Y-%m-%d %H:%M")
+        font = self._get_truetype_font(spec['font_size'], spec['font_family'])
         
         # Measure text size using a temporary draw context
-        tmp_draw = ImageDraw.Draw(overlay)
+        tmp_draw = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
         bbox = tmp_draw.textbbox((0, 0), text, font=font)
         text_width = bbox[2] - bbox[0]
         text_height = bbox[3] - bbox[1]
         
         # Get color and opacity
         try:
-            color = ImageColor.getrgb(self.color_var.get())
+            color = ImageColor.getrgb(spec['color'])
         except:
             color = (255, 255, 255)
         
-        opacity = int(self.opacity.get() * 2.55)  # Convert to 0-255 range
+        opacity = int(spec['opacity'] * 2.55)  # Convert to 0-255 range
         
         # Create a separate watermark layer sized to the text, draw text then rotate
         shadow_offset = 2
@@ -627,71 +2164,93 @@ class WatermarkApp:
         text_draw.text((origin_x, origin_y), text, font=font, fill=text_color)
         
         # Apply rotation
-        angle = self.rotation.get() if hasattr(self, 'rotation') else 0
+        angle = spec.get('rotation', 0)
         if angle:
             text_layer = text_layer.rotate(angle, expand=True, resample=Image.Resampling.BICUBIC)
-        
-        # Compute position based on rotated size
-        position = self.get_watermark_position(image.size, text_layer.size)
-        
-        # Paste rotated text layer onto overlay using its alpha
-        overlay.paste(text_layer, position, text_layer)
-        
-        # Merge layers
-        return Image.alpha_composite(image, overlay)
+        return text_layer
     
-    def apply_image_watermark(self, image):
-        """Apply image watermark"""
-        if not self.watermark_config['image_path']:
-            return image
-        
-        try:
-            watermark_img = Image.open(self.watermark_config['image_path'])
-            if watermark_img.mode != "RGBA":
-                watermark_img = watermark_img.convert("RGBA")
-            
-            # Adjust watermark size
-            scale = self.image_scale.get()
-            new_size = (int(watermark_img.width * scale), int(watermark_img.height * scale))
-            watermark_img = watermark_img.resize(new_size, Image.Resampling.LANCZOS)
-            
-            # Adjust opacity
-            opacity = int(self.image_opacity.get() * 2.55)
-            if opacity < 255:
-                alpha = watermark_img.split()[-1]
-                alpha = alpha.point(lambda p: int(p * opacity / 255))
-                watermark_img.putalpha(alpha)
-            
-            # Apply rotation if any
-            angle = self.rotation.get() if hasattr(self, 'rotation') else 0
-            if angle:
-                watermark_img = watermark_img.rotate(angle, expand=True, resample=Image.Resampling.BICUBIC)
-            
-            # Calculate position
-            position = self.get_watermark_position(image.size, watermark_img.size)
-            
-            # Create transparent layer
-            if image.mode != "RGBA":
-                image = image.convert("RGBA")
-            
-            overlay = Image.new("RGBA", image.size, (0, 0, 0, 0))
-            overlay.paste(watermark_img, position, watermark_img)
-            
-            return Image.alpha_composite(image, overlay)
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to apply image watermark: {e}")
-            return image
+    def _render_image_layer(self, spec: dict):
+        with Image.open(spec['image_path']) as source:
+            watermark_img = source.convert("RGBA")
+        
+        # Adjust watermark size
+        scale = spec['image_scale']
+        new_size = (int(watermark_img.width * scale), int(watermark_img.height * scale))
+        watermark_img = watermark_img.resize(new_size, Image.Resampling.LANCZOS)
+        
+        # Adjust opacity
+        opacity = int(spec['image_opacity'] * 2.55)
+        if opacity < 255:
+            alpha = watermark_img.split()[-1]
+            alpha = alpha.point(lambda p: int(p * opacity / 255))
+            watermark_img.putalpha(alpha)
+        
+        # Apply rotation if any
+        angle = spec.get('rotation', 0)
+        if angle:
+            watermark_img = watermark_img.rotate(angle, expand=True, resample=Image.Resampling.BICUBIC)
+        return watermark_img
+    
+    def _custom_center(self, spec: dict) -> Tuple[float, float]:
+        """Relative (0-1) watermark center used by the 'custom' position"""
+        return (spec.get('custom_x', 0.5), spec.get('custom_y', 0.5))
+    
+    def auto_position(self, image, layer, image_size=None) -> str:
+        """Preset anchor whose background is least busy and contrasts most with the watermark.
+        Scored on a ~128 px grayscale proxy; `image` may be a reduced copy of an image of `image_size`."""
+        image_size = image_size or image.size
+        # Point-sample 4x the proxy size, then box-average: cost does not grow with the image
+        scale = min(1.0, AUTO_PROXY_EDGE / max(image.size))
+        proxy_size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        sampled = image.resize((proxy_size[0] * 4, proxy_size[1] * 4), Image.Resampling.NEAREST)
+        proxy = _to_8bit(sampled).convert("L").reduce(4)
+        edges = proxy.filter(ImageFilter.FIND_EDGES)
+        # Brightness of the watermark's visible pixels
+        mark_luma = ImageStat.Stat(layer.convert("L"), mask=layer.getchannel("A")).mean[0]
+        
+        scale_x = proxy.width / image_size[0]
+        scale_y = proxy.height / image_size[1]
+        best, best_score = AUTO_POSITIONS[-1], None
+        for anchor in AUTO_POSITIONS:
+            x, y = self.get_watermark_position(image_size, layer.size, anchor)
+            x0 = min(max(0, int(x * scale_x)), proxy.width - 1)
+            y0 = min(max(0, int(y * scale_y)), proxy.height - 1)
+            x1 = max(x0 + 1, min(proxy.width, math.ceil((x + layer.width) * scale_x)))
+            y1 = max(y0 + 1, min(proxy.height, math.ceil((y + layer.height) * scale_y)))
+            region = ImageStat.Stat(proxy.crop((x0, y0, x1, y1)))
+            edge_energy = ImageStat.Stat(edges.crop((x0, y0, x1, y1))).mean[0] / 255
+            spread = region.stddev[0] / 128
+            contrast = abs(region.mean[0] - mark_luma) / 255
+            # Lower is better; ties keep the earlier anchor so results are stable
+            score = edge_energy + spread - contrast
+            if best_score is None or score < best_score - 1e-9:
+                best, best_score = anchor, score
+        return best
     
-    def get_watermark_position(self, image_size, watermark_size):
+    def _preview_position(self, spec: dict, layer) -> str:
+        """Anchor for the preview; 'auto' is scored on a small cached pyramid level"""
+        if spec['position'] != "auto":
+            return spec['position']
+        if self.pyramid is None:
+            return self.auto_position(self.original_image, layer)
+        size = self.pyramid.size
+        level = self.pyramid.level(self.pyramid.level_for_scale(AUTO_PROXY_EDGE / max(size)))
+        return self.auto_position(level, layer, size)
+    
+    def get_watermark_position(self, image_size, watermark_size, position: Optional[str] = None,
+                               custom_center: Optional[Tuple[float, float]] = None):
         """Calculate watermark position"""
         img_width, img_height = image_size
         wm_width, wm_height = watermark_size
         margin = 20
         
-        position = self.position_var.get()
+        if position is None:
+            position = self.position_var.get()
         
-        if position == "top-left":
+        if position == "custom":
+            rel_x, rel_y = custom_center or (0.5, 0.5)
+            return (round(rel_x * img_width - wm_width / 2), round(rel_y * img_height - wm_height / 2))
+        elif position == "top-left":
             return (margin, margin)
         elif position == "top-center":
             return ((img_width - wm_width) // 2, margin)
@@ -710,6 +2269,230 @@ class WatermarkApp:
         else:  # bottom-right
             return (img_width - wm_width - margin, img_height - wm_height - margin)
     
+    def render_proof_tile(self, image_path, spec: dict, options: dict, tile_size: int):
+        """Watermarked RGB thumbnail of how `image_path` exports with `options`, from a reduced decode.
+        The watermark is scaled with the image, so its size and placement match the export."""
+        with Image.open(image_path) as im:
+            source_size = im.size
+            thumb = self._embedded_thumbnail(im, tile_size)
+            if thumb is None:
+                # thumbnail() decodes JPEGs at reduced scale and reduces before resampling
+                im.thumbnail((tile_size, tile_size))
+                thumb = im
+            else:
+                thumb.thumbnail((tile_size, tile_size))
+            thumb = _to_8bit(thumb).convert("RGBA")
+        crop = self._scale_box(self.output_crop(source_size, options), source_size, thumb.size)
+        if crop:
+            thumb = thumb.crop(crop)
+        tile = self._composite_scaled(thumb, self.output_size(source_size, options), spec)
+        return tile.convert("RGB")
+    
+    @staticmethod
+    def _embedded_thumbnail(im, tile_size: int):
+        """The EXIF preview most camera JPEGs carry (~160 px), if it is large enough and has the image's shape"""
+        exif = im.info.get('exif') if im.format == "JPEG" else None
+        if not exif:
+            return None
+        from PIL import ExifTags
+        try:
+            ifd1 = im.getexif().get_ifd(ExifTags.IFD.IFD1)
+            offset, length = ifd1.get(0x0201), ifd1.get(0x0202)
+            if not offset or not length:
+                return None
+            # Offsets are relative to the TIFF header after the "Exif\0\0" marker
+            thumb = Image.open(io.BytesIO(exif[6 + offset:6 + offset + length]))
+            thumb.load()
+        except Exception:
+            return None
+        # Letterboxed previews have a different aspect ratio than the image
+        if max(thumb.size) < min(tile_size, max(im.size)) or \
+                abs(thumb.width / thumb.height - im.width / im.height) > 0.02 * im.width / im.height:
+            return None
+        return thumb
+    
+    def _composite_scaled(self, proxy, image_size, spec: dict):
+        """Composite the watermark onto `proxy`, a reduced copy of an image of `image_size`"""
+        if spec['watermark_type'] != "text" and not spec['image_path']:
+            return proxy
+        try:
+            layer = self.render_watermark_layer(spec)
+        except Exception as e:
+            print(f"Failed to render watermark: {e}")
+            return proxy
+        anchor = self.auto_position(proxy, layer, image_size) if spec['position'] == "auto" else spec['position']
+        x, y = self.get_watermark_position(image_size, layer.size, anchor, self._custom_center(spec))
+        scale = proxy.width / image_size[0]
+        size = (max(1, round(layer.width * scale)), max(1, round(layer.height * scale)))
+        layer = layer.resize(size, Image.Resampling.LANCZOS)
+        overlay = Image.new("RGBA", proxy.size, (0, 0, 0, 0))
+        overlay.paste(layer, (round(x * scale), round(y * scale)), layer)
+        return Image.alpha_composite(proxy, overlay)
+    
+    def open_contact_sheet(self):
+        """Show every image as a small watermarked tile in a scrollable grid, rendered in the background"""
+        if not self.images:
+            messagebox.showwarning("Warning", "Please select images to process first")
+            return
+        self._build_lazy_panels()
+        self.close_contact_sheet()
+        # Snapshot settings on the UI thread; reopen the sheet to pick up later changes
+        spec, options = self._collect_template(), self._collect_export_options()
+        images = list(self.images)
+        
+        window = tk.Toplevel(self.root)
+        window.title(f"Contact Sheet - {len(images)} images")
+        window.geometry("1000x700")
+        toolbar = ttk.Frame(window, padding=5)
+        toolbar.pack(fill=tk.X)
+        ttk.Button(toolbar, text="Export Proof Sheets (PDF)...", command=self.export_proof_sheets_dialog).pack(side=tk.LEFT)
+        status_var = tk.StringVar(value=f"Rendering 0/{len(images)}")
+        ttk.Label(toolbar, textvariable=status_var).pack(side=tk.LEFT, padx=(10, 0))
+        
+        grid_frame = ttk.Frame(window)
+        grid_frame.pack(fill=tk.BOTH, expand=True)
+        canvas = tk.Canvas(grid_frame, bg='#f0f0f0', highlightthickness=0)
+        scrollbar = ttk.Scrollbar(grid_frame, orient=tk.VERTICAL, command=self._scroll_contact_sheet)
+        canvas.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        canvas.bind('<Configure>', lambda event: self._draw_contact_sheet())
+        canvas.bind('<MouseWheel>', lambda event: self._scroll_contact_sheet('scroll', int(-1 * (event.delta / 120)), 'units'))
+        canvas.bind('<Button-4>', lambda event: self._scroll_contact_sheet('scroll', -1, 'units'))
+        canvas.bind('<Button-5>', lambda event: self._scroll_contact_sheet('scroll', 1, 'units'))
+        canvas.bind('<Double-Button-1>', self.on_contact_sheet_double_click)
+        window.protocol("WM_DELETE_WINDOW", self.close_contact_sheet)
+        
+        sheet = {'window': window, 'canvas': canvas, 'status': status_var, 'images': images,
+                 'spec': spec, 'options': options, 'tiles': [None] * len(images), 'photos': {},
+                 'columns': 1, 'done': 0, 'started': time.perf_counter(), 'results': queue.Queue(),
+                 'executor': ThreadPoolExecutor(max_workers=os.cpu_count() or 1)}
+        self._sheet = sheet
+        
+        def render(index, image_path):
+            if self._sheet is not sheet:
+                return
+            try:
+                tile = self.render_proof_tile(image_path, spec, options, CONTACT_TILE_SIZE)
+            except Exception as e:
+                print(f"Failed to render tile for {image_path}: {e}")
+                tile = False
+            sheet['results'].put((index, tile))
+        
+        for index, image_path in enumerate(images):
+            sheet['executor'].submit(render, index, image_path)
+        self.root.after(100, self._poll_contact_sheet, sheet)
+    
+    def close_contact_sheet(self):
+        """Close the contact sheet and cancel tiles not yet rendered"""
+        sheet, self._sheet = self._sheet, None
+        if sheet:
+            sheet['executor'].shutdown(wait=False, cancel_futures=True)
+            sheet['window'].destroy()
+    
+    def _poll_contact_sheet(self, sheet):
+        """Move finished tiles from the render threads into the grid (UI thread only)"""
+        if self._sheet is not sheet:
+            return
+        received = 0
+        while True:
+            try:
+                index, tile = sheet['results'].get_nowait()
+            except queue.Empty:
+                break
+            sheet['tiles'][index] = tile
+            received += 1
+        total = len(sheet['images'])
+        if received:
+            sheet['done'] += received
+            self._draw_contact_sheet()
+        if sheet['done'] < total:
+            sheet['status'].set(f"Rendering {sheet['done']}/{total}")
+            self.root.after(100, self._poll_contact_sheet, sheet)
+        else:
+            sheet['status'].set(f"{total} images rendered in {time.perf_counter() - sheet['started']:.1f}s")
+    
+    def _scroll_contact_sheet(self, *args):
+        if self._sheet:
+            self._sheet['canvas'].yview(*args)
+            self._draw_contact_sheet()
+    
+    def _draw_contact_sheet(self):
+        """Draw the visible rows of the grid; only visible tiles hold a PhotoImage"""
+        sheet = self._sheet
+        if not sheet:
+            return
+        canvas = sheet['canvas']
+        tile = CONTACT_TILE_SIZE
+        cell_w, cell_h = tile + 10, tile + 26
+        count = len(sheet['images'])
+        columns = max(1, canvas.winfo_width() // cell_w)
+        sheet['columns'] = columns
+        canvas.configure(scrollregion=(0, 0, columns * cell_w, -(-count // columns) * cell_h))
+        top = canvas.canvasy(0)
+        first = int(top // cell_h) * columns
+        last = min(count, (int((top + canvas.winfo_height()) // cell_h) + 1) * columns)
+        
+        canvas.delete("all")
+        photos = {}
+        for index in range(first, last):
+            x = (index % columns) * cell_w + 5
+            y = (index // columns) * cell_h + 5
+            image = sheet['tiles'][index]
+            if image:
+                photos[index] = sheet['photos'].get(index) or ImageTk.PhotoImage(image)
+                canvas.create_image(x + tile // 2, y + tile // 2, anchor=tk.CENTER, image=photos[index])
+            else:
+                canvas.create_rectangle(x, y, x + tile, y + tile, fill='#dddddd', outline='')
+                canvas.create_text(x + tile // 2, y + tile // 2, text="Failed" if image is False else "...", fill='#666666')
+            name = Path(sheet['images'][index]).name
+            if len(name) > 22:
+                name = name[:10] + "..." + name[-9:]
+            canvas.create_text(x + tile // 2, y + tile + 10, text=f"{index + 1}. {name}", fill='#333333')
+        sheet['photos'] = photos
+    
+    def on_contact_sheet_double_click(self, event):
+        """Open the double-clicked tile in the main preview"""
+        sheet = self._sheet
+        if not sheet:
+            return
+        canvas = sheet['canvas']
+        cell_w, cell_h = CONTACT_TILE_SIZE + 10, CONTACT_TILE_SIZE + 26
+        column = int(canvas.canvasx(event.x) // cell_w)
+        index = int(canvas.canvasy(event.y) // cell_h) * sheet['columns'] + column
+        if column >= sheet['columns'] or index >= len(sheet['images']):
+            return
+        image_path = sheet['images'][index]
+        if image_path in self.images:
+            self.current_image_index = self.images.index(image_path)
+            self.update_image_list()
+            self.load_current_image()
+            self.root.lift()
+    
+    def export_proof_sheets_dialog(self):
+        """Export the contact sheet's images as a multi-page PDF proof in the background"""
+        sheet = self._sheet
+        if not sheet or not self._ensure_output_dir():
+            return
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = filedialog.asksaveasfilename(parent=sheet['window'], title="Export Proof Sheets",
+                                            initialdir=self.output_dir, initialfile=f"proof_{stamp}.pdf",
+                                            defaultextension=".pdf", filetypes=[('PDF Files', '*.pdf')])
+        if not path:
+            return
+        
+        def run():
+            try:
+                pages = self.export_proof_sheets(sheet['images'], sheet['spec'], sheet['options'], path)
+                self.root.after(0, lambda: messagebox.showinfo("Done", f"Proof sheets saved ({pages} pages):\n{path}"))
+            except Exception as e:
+                self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to export proof sheets: {e}"))
+            finally:
+                self.root.after(0, self.progress.stop)
+        
+        self.progress.start()
+        threading.Thread(target=run, daemon=True).start()
+    
     def prev_image(self):
         """Previous image"""
         if self.images and self.current_image_index > 0:
@@ -806,12 +2589,8 @@ class WatermarkApp:
             self.output_path_var.set(folder)
             self.output_dir = folder
     
-    def start_export(self):
-        """Start export"""
-        if not self.images:
-            messagebox.showwarning("Warning", "Please select images to process first")
-            return
-        
+    def _ensure_output_dir(self) -> bool:
+        """Make sure an output folder is set, defaulting to ./output"""
         if not self.output_dir:
             # Default to ./output if not selected
             default_out = os.path.join(os.getcwd(), 'output')
@@ -820,53 +2599,626 @@ class WatermarkApp:
                 Path(self.output_dir).mkdir(parents=True, exist_ok=True)
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to create default output folder: {e}")
-                return
+                return False
             # Reflect in UI field
             try:
                 self.output_path_var.set(self.output_dir)
             except Exception:
                 pass
+        return True
+    
+    def start_export(self):
+        """Start export"""
+        if not self.images:
+            messagebox.showwarning("Warning", "Please select images to process first")
+            return
         
-        # Run export in background thread
+        self._build_lazy_panels()
+        if not self._ensure_output_dir():
+            return
+        
+        # Snapshot settings on the UI thread, then run export in background thread
+        targets = self._collect_export_targets()
+        sink_kind = self.output_sink.get()
+        self._update_memory_budget()
         self.progress.start()
-        export_thread = threading.Thread(target=self.export_images)
+        export_thread = threading.Thread(target=self.export_images, args=(targets, sink_kind))
         export_thread.daemon = True
         export_thread.start()
     
-    def export_images(self):
+    def start_dry_run(self):
+        """Estimate the export's runtime, peak memory and output size without rendering the batch"""
+        if not self.images:
+            messagebox.showwarning("Warning", "Please select images to process first")
+            return
+        self._build_lazy_panels()
+        targets = self._collect_export_targets()
+        images = list(self.images)
+        self._update_memory_budget()
+        self.progress.start()
+        
+        def run():
+            try:
+                plan = self.plan_export(images, targets)
+                self.root.after(0, lambda: messagebox.showinfo("Dry Run", format_plan(plan, limit=15)))
+            except Exception as e:
+                self.root.after(0, lambda: messagebox.showerror("Error", f"Dry run failed: {e}"))
+            finally:
+                self.root.after(0, self.progress.stop)
+        
+        threading.Thread(target=run, daemon=True).start()
+    
+    def save_manifest(self):
+        """Save the image list and export targets as a manifest for sharded headless export"""
+        if not self.images:
+            messagebox.showwarning("Warning", "Please select images to process first")
+            return
+        if not self._ensure_output_dir():
+            return
+        path = filedialog.asksaveasfilename(title="Save Batch Manifest", defaultextension=".json",
+                                            filetypes=[('JSON Files', '*.json')])
+        if not path:
+            return
+        try:
+            manifest = BatchManifest.create(path, self.images, self._collect_export_targets(), self.output_dir)
+            messagebox.showinfo("Success", f"Manifest saved with {len(manifest.inputs)} images.\n"
+                                f"Run: python watermark_gui.py shard \"{path}\" --index 0 --count N")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save manifest: {e}")
+    
+    def _collect_export_options(self) -> dict:
+        """Snapshot the current export settings"""
+        return {
+            'format': self.output_format.get(),
+            'quality': self.quality.get(),
+            'naming_rule': self.naming_rule.get(),
+            'prefix': self.prefix_var.get(),
+            'suffix': self.suffix_var.get(),
+            'max_edge': self.max_edge.get(),
+            'resize_mode': self.resize_mode.get()
+        }
+    
+    def _update_memory_budget(self):
+        """Apply the memory budget setting to the shared export budget"""
+        try:
+            budget_mb = self.memory_budget_mb.get()
+        except Exception:
+            budget_mb = 0
+        self.memory_budget.set_budget(budget_mb * 1024 * 1024 if budget_mb > 0 else MemoryBudget.default_budget())
+    
+    def _collect_export_targets(self) -> List[dict]:
+        """Return the configured export targets, or a single target from the current settings"""
+        if self.export_targets:
+            return list(self.export_targets)
+        return [{'spec': self._collect_template(), 'options': self._collect_export_options(), 'subfolder': ''}]
+    
+    def add_export_target(self):
+        """Add the current watermark and export settings as an export target"""
+        subfolder = self.subfolder_var.get().strip()
+        if Path(subfolder).is_absolute() or '..' in Path(subfolder).parts:
+            messagebox.showwarning("Warning", "Subfolder must be a relative path inside the output folder")
+            return
+        target = {'spec': self._collect_template(), 'options': self._collect_export_options(), 'subfolder': subfolder}
+        self.export_targets.append(target)
+        self.update_target_list()
+    
+    def remove_export_target(self):
+        """Remove the selected export target"""
+        selection = self.target_listbox.curselection()
+        if not selection:
+            messagebox.showwarning("Warning", "Please select a target to remove")
+            return
+        del self.export_targets[selection[0]]
+        self.update_target_list()
+    
+    def update_target_list(self):
+        """Update export target list display"""
+        self.target_listbox.delete(0, tk.END)
+        for target in self.export_targets:
+            spec, options = target['spec'], target['options']
+            if spec['watermark_type'] == "text":
+                mark = f"text '{spec['text']}'"
+            else:
+                mark = f"image {Path(spec['image_path'] or '').name}"
+            quality = f" q{options['quality']}" if options['format'] == "JPEG" else ""
+            size = f" {options['resize_mode']} {options['max_edge']}px" if options.get('max_edge') else ""
+            self.target_listbox.insert(tk.END, f"{target['subfolder'] or '.'}/: {options['format']}{quality}{size}, {mark}")
+    
+    def output_size(self, source_size, options: dict) -> Tuple[int, int]:
+        """Output size for the resize options: 'fit' scales the long edge down to max_edge;
+        'fill' scales the short edge down to max_edge and crops the long edge (centred, see
+        output_crop) to it, filling a max_edge square. Images are never upscaled."""
+        max_edge = options.get('max_edge') or 0
+        width, height = source_size
+        if max_edge <= 0:
+            return source_size
+        fill = options.get('resize_mode') == "fill"
+        crop = self.output_crop(source_size, options)
+        if crop:
+            width, height = crop[2] - crop[0], crop[3] - crop[1]
+        edge = min(width, height) if fill else max(width, height)
+        if edge <= max_edge:
+            return source_size if crop is None else (width, height)
+        scale = max_edge / edge
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        return (min(size[0], max_edge), min(size[1], max_edge)) if fill else size
+    
+    def output_crop(self, source_size, options: dict) -> Optional[Tuple[int, int, int, int]]:
+        """Centred source box a 'fill' export keeps, or None when nothing is cropped"""
+        max_edge = options.get('max_edge') or 0
+        if max_edge <= 0 or options.get('resize_mode') != "fill":
+            return None
+        width, height = source_size
+        # Largest box that is at most max_edge on both edges once the short edge is scaled down
+        scale = min(1.0, max_edge / min(width, height))
+        keep_w, keep_h = min(width, round(max_edge / scale)), min(height, round(max_edge / scale))
+        if (keep_w, keep_h) == (width, height):
+            return None
+        left, top = (width - keep_w) // 2, (height - keep_h) // 2
+        return (left, top, left + keep_w, top + keep_h)
+    
+    @staticmethod
+    def _scale_box(box, from_size, to_size) -> Optional[Tuple[int, int, int, int]]:
+        """`box` in a source of `from_size`, mapped onto a reduced decode of `to_size`"""
+        if box is None or tuple(from_size) == tuple(to_size):
+            return box
+        sx, sy = to_size[0] / from_size[0], to_size[1] / from_size[1]
+        return (round(box[0] * sx), round(box[1] * sy), round(box[2] * sx), round(box[3] * sy))
+    
+    def downscale(self, image, size, box=None):
+        """Downscale with a cheap integer `reduce` first, then LANCZOS for the final step.
+        `box` (image pixels) crops the image first, for 'fill' exports."""
+        if box is not None:
+            image = image.crop(box)
+        if image.size == tuple(size):
+            return image
+        source = image
+        if image.mode == "1":
+            image = image.convert("L")
+        elif image.mode == "P":
+            image = image.convert("RGBA")
+        # Keep at least 2x headroom for LANCZOS so quality matches a direct resize
+        factor = int(min(image.width / size[0], image.height / size[1]) // 2)
+        if factor >= 2:
+            # reduce() has no 16-bit variant; 32-bit integers keep the full depth
+            mode = image.mode
+            if mode in DEEP_GRAY_MODES and mode != "I":
+                image = image.convert("I").reduce(factor).convert(mode)
+            else:
+                image = image.reduce(factor)
+        image = image.resize(size, Image.Resampling.LANCZOS)
+        if source.mode == "1":
+            return image.convert("1")
+        if source.mode == "P" and source.palette.mode == "RGB":
+            return self._requantize(image, source)
+        return image
+    
+    @staticmethod
+    def _requantize(image, source):
+        """Map an RGBA resize of the P image `source` back onto its palette. With a transparent
+        index, pixels under half alpha take that index and all others the nearest other entry."""
+        palette = source.getpalette()
+        transparency = source.info.get('transparency')
+        if isinstance(transparency, int) and len(palette) > 3 and transparency < len(palette) // 3:
+            # Match against the palette without the transparent entry, then shift indices back
+            lookup = Image.new("P", (1, 1))
+            lookup.putpalette(palette[:3 * transparency] + palette[3 * transparency + 3:])
+            result = image.convert("RGB").quantize(palette=lookup, dither=Image.Dither.NONE)
+            result = result.point([i if i < transparency else i + 1 for i in range(256)])
+            result.paste(transparency, mask=image.getchannel("A").point(lambda a: 255 if a < 128 else 0))
+        else:
+            result = image.convert("RGB").quantize(palette=source, dither=Image.Dither.NONE)
+        result.putpalette(palette)
+        result.info.update(image.info)
+        if transparency is not None:
+            result.info['transparency'] = transparency
+        return result
+    
+    def estimate_job_memory(self, image_path, targets: List[dict]) -> int:
+        """Estimate peak bytes for exporting one file, from its header only"""
+        with Image.open(image_path) as img:
+            source_size, mode, image_format = img.size, img.mode, img.format
+            # Frames only matter when they are buffered, and counting them may scan the file
+            frames = 1
+            if image_format in ANIMATED_FORMATS and not FrameStreamWriter.streaming_supported(image_format):
+                frames = getattr(img, 'n_frames', 1)
+        sizes = [self.output_size(source_size, target['options']) for target in targets]
+        return self._job_memory(source_size, mode, image_format, sizes, frames)
+    
+    @staticmethod
+    def _decode_size(source_size, image_format: str, largest) -> Tuple[int, int]:
+        """Size the source decodes at: JPEG draft decodes at 1/2, 1/4 or 1/8 scale when that
+        still covers the largest target"""
+        if image_format == "JPEG":
+            for scale in (8, 4, 2):
+                if source_size[0] // scale >= largest[0] and source_size[1] // scale >= largest[1]:
+                    return (-(-source_size[0] // scale), -(-source_size[1] // scale))
+        return tuple(source_size)
+    
+    def _job_memory(self, source_size, mode: str, image_format: str, sizes: List[Tuple[int, int]],
+                    frames: int = 1) -> int:
+        """Peak bytes for one file with output `sizes` and `frames` frames, see estimate_job_memory"""
+        largest = max(sizes, key=lambda size: size[0] * size[1])
+        decode_w, decode_h = self._decode_size(source_size, image_format, largest)
+        # Pillow stores multi-band pixels in 4 bytes; single-band in 1, 2 or 4
+        bytes_per_pixel = {'1': 1, 'L': 1, 'P': 1, 'I;16': 2, 'I;16B': 2, 'I;16L': 2}.get(mode, 4)
+        decoded = decode_w * decode_h * bytes_per_pixel
+        
+        # Cached RGBA base per output size, plus the working set of the largest target:
+        # overlay, composite result and the RGB copy for JPEG encoding
+        bases = sum(w * h * 4 for w, h in set(sizes))
+        working = max(w * h * 12 for w, h in sizes)
+        # Animated and multi-page sources decode one frame at a time. Where FrameStreamWriter
+        # cannot stream the container, every target's RGBA frames are kept until save_all,
+        # which for GIF also holds a paletted copy of each
+        buffered = 0
+        if frames > 1 and not FrameStreamWriter.streaming_supported(image_format):
+            buffered = frames * sum(w * h * (5 if image_format == "GIF" else 4) for w, h in sizes)
+        return int((decoded + bases + working + buffered) * 1.1)
+    
+    @staticmethod
+    def _calibration_image():
+        """Photo-like synthetic content: smooth gradients with fine grain, so encoders see some detail"""
+        bands = [Image.linear_gradient('L'), Image.radial_gradient('L'), Image.linear_gradient('L').rotate(90)]
+        noise = Image.effect_noise(CALIBRATION_SIZE, 40)
+        return Image.merge("RGB", [Image.blend(band.resize(CALIBRATION_SIZE), noise, 0.25) for band in bands])
+    
+    def calibrate_export(self, targets: List[dict], sample=None) -> dict:
+        """Time decoding, resizing and each target's watermark and encode on this machine, on a
+        synthetic image or a reduced decode of `sample`. Returns seconds per pixel for each step
+        and the encoded bytes per pixel of each target."""
+        if sample:
+            with Image.open(sample) as im:
+                im.draft("RGB", CALIBRATION_SIZE)
+                im.thumbnail(CALIBRATION_SIZE)
+                image = im.convert("RGB")
+        else:
+            image = self._calibration_image()
+        pixels = image.width * image.height
+        
+        def fastest(fn, runs: int = 3) -> float:
+            times = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                fn()
+                times.append(time.perf_counter() - start)
+            return min(times)
+        
+        def load(data):
+            with Image.open(io.BytesIO(data)) as im:
+                im.load()
+        
+        decode = {}
+        source_bytes = {}
+        for image_format in ("JPEG", "PNG"):
+            buffer = io.BytesIO()
+            image.save(buffer, image_format, quality=90)
+            data = buffer.getvalue()
+            decode[image_format] = fastest(lambda: load(data)) / pixels
+            source_bytes[image_format] = len(data) / pixels
+        half = (image.width // 2, image.height // 2)
+        resize = fastest(lambda: self.downscale(image, half)) / pixels
+        
+        calibrated = []
+        for target in targets:
+            def render():
+                return self.encode_image(self.apply_watermark(image, target['spec']), target['options'])
+            # The first render also fills the layer cache, as the first file of an export does
+            data = render()
+            calibrated.append({'seconds_per_pixel': fastest(render) / pixels, 'bytes_per_pixel': len(data) / pixels})
+        return {'pixels': pixels, 'decode': decode, 'source_bytes_per_pixel': source_bytes,
+                'resize': resize, 'targets': calibrated}
+    
+    @staticmethod
+    def _mode_warnings(mode: str, targets: List[dict]) -> List[str]:
+        """Output formats that cannot store a source mode as it is"""
+        found = []
+        for target in targets:
+            image_format = target['options']['format']
+            if image_format == "JPEG" and mode in DEEP_GRAY_MODES:
+                found.append(f"{mode} is reduced to 8 bits for JPEG")
+            elif image_format == "JPEG" and mode in ("RGBA", "LA", "PA", "RGBa", "La"):
+                found.append(f"{mode} loses its transparency in JPEG")
+            elif image_format == "PNG" and mode == "CMYK":
+                found.append("CMYK is converted to RGB for PNG")
+        return list(dict.fromkeys(found))
+    
+    def plan_export(self, images: List[str], targets: List[dict], max_workers: Optional[int] = None,
+                    calibration: Optional[dict] = None) -> dict:
+        """Dry run of an export: read every file's header (no pixel data), estimate its time,
+        memory and output bytes from a calibration run, then replay the budgeted scheduler to
+        estimate total runtime and peak memory with `max_workers` threads"""
+        if calibration is None:
+            calibration = self.calibrate_export(targets)
+        workers = max_workers or os.cpu_count() or 1
+        # Threads beyond the CPU count share cores
+        slowdown = max(1.0, workers / (os.cpu_count() or 1))
+        
+        def area(size):
+            return size[0] * size[1]
+        
+        files = []
+        jobs = []
+        target_bytes = [0] * len(targets)
+        for image_path in images:
+            header = read_image_header(image_path)
+            files.append(header)
+            if header['error']:
+                continue
+            frames = header['frames']
+            sizes = [self.output_size(header['size'], target['options']) for target in targets]
+            decode_size = self._decode_size(header['size'], header['format'], max(sizes, key=area))
+            # Formats other than JPEG are timed as PNG, the slowest lossless decoder
+            seconds = area(decode_size) * calibration['decode'].get(header['format'], calibration['decode']['PNG'])
+            seconds += sum(area(decode_size) for size in set(sizes) if size != decode_size) * calibration['resize']
+            # Content compresses and encodes like the calibration image scaled by how much larger
+            # the source file is than the calibration image in the same format
+            detail = 1.0
+            if header['format'] in calibration['source_bytes_per_pixel']:
+                source_bytes = header['file_bytes'] / (area(header['size']) * frames)
+                detail = min(4.0, max(0.25, source_bytes / calibration['source_bytes_per_pixel'][header['format']]))
+            output_bytes = 0
+            for index, size in enumerate(sizes):
+                seconds += area(size) * calibration['targets'][index]['seconds_per_pixel'] * detail
+                if frames > 1:
+                    # Animations keep their container, so they scale with their own file size
+                    encoded = int(header['file_bytes'] * area(size) / area(header['size']))
+                else:
+                    encoded = int(area(size) * calibration['targets'][index]['bytes_per_pixel'] * detail)
+                target_bytes[index] += encoded
+                output_bytes += encoded
+            header.update(seconds=seconds * frames, output_bytes=output_bytes,
+                          memory=self._job_memory(header['size'], header['mode'], header['format'], sizes, frames))
+            header['warnings'] += self._mode_warnings(header['mode'], targets)
+            jobs.append((header['seconds'] * slowdown, header['memory']))
+        
+        budget = self.memory_budget.budget_bytes
+        seconds, peak = self._simulate_schedule(jobs, workers, budget)
+        return {'files': files, 'workers': workers, 'budget': budget, 'seconds': seconds, 'peak_memory': peak,
+                'output_bytes': sum(target_bytes), 'calibration': calibration,
+                'targets': [{'format': target['options']['format'], 'quality': target['options']['quality'],
+                             'subfolder': target['subfolder'], 'bytes': size}
+                            for target, size in zip(targets, target_bytes)]}
+    
+    @staticmethod
+    def _simulate_schedule(jobs: List[Tuple[float, int]], workers: int, budget: int) -> Tuple[float, int]:
+        """Replay run_budgeted_export's admission for (seconds, bytes) jobs: each starts in order
+        once a worker is free and its memory fits the budget (larger jobs run alone). The export
+        can also start a later job that fits while an earlier one waits for room, so the runtime
+        is an upper bound. Returns the total runtime and the peak estimated memory in use."""
+        import heapq
+        running = []
+        now = in_use = peak = 0
+        for order, (seconds, cost) in enumerate(jobs):
+            granted = min(cost, budget)
+            while running and (len(running) >= workers or in_use + granted > budget):
+                finish, _, released, _ = heapq.heappop(running)
+                now = max(now, finish)
+                in_use -= released
+            heapq.heappush(running, (now + seconds, order, granted, cost))
+            in_use += granted
+            # Oversized jobs hold more than the budget they were granted
+            peak = max(peak, sum(item[3] for item in running))
+        return max([item[0] for item in running], default=0), peak
+    
+    def export_targets_for(self, image_path, sink: OutputSink, targets: List[dict]) -> List[Future]:
+        """Decode a source once and hand every target from that decode to the sink; returns the write futures"""
+        input_path = Path(image_path)
+        bases = {}
+        written = []
+        errors = []
+        with Image.open(image_path) as original:
+            if original.format in ANIMATED_FORMATS and getattr(original, 'n_frames', 1) > 1:
+                return self.export_frames_for(original, input_path, sink, targets)
+            source_size = original.size
+            sizes = [self.output_size(source_size, target['options']) for target in targets]
+            crops = [self.output_crop(source_size, target['options']) for target in targets]
+            # Decode only the resolution the largest target needs (JPEG DCT scaling). Fill crops
+            # keep the whole short edge, so covering the output size still covers the crop
+            largest = max(sizes, key=lambda size: size[0] * size[1])
+            if largest != original.size:
+                original.draft(original.mode, largest)
+            original.load()
+            
+            try:
+                for target, size, crop in zip(targets, sizes, crops):
+                    try:
+                        options = target['options']
+                        
+                        # Resize before watermarking so the watermark is sized for the output;
+                        # targets sharing a size and crop share one resized base
+                        base = bases.get((size, crop))
+                        if base is None:
+                            base = self.downscale(original, size, self._scale_box(crop, source_size, original.size))
+                            bases[(size, crop)] = base
+                        
+                        # Apply watermark (the shared base is never modified in place)
+                        watermarked = self.apply_watermark(base, target['spec'])
+                        try:
+                            data = self.encode_image(watermarked, options)
+                        finally:
+                            if watermarked is not base:
+                                watermarked.close()
+                        name = self.generate_output_filename(input_path, options)
+                        if target['subfolder']:
+                            name = (Path(target['subfolder']) / name).as_posix()
+                        written.append(sink.write(name, data))
+                    except Exception as e:
+                        errors.append(f"{target['subfolder'] or '.'}: {e}")
+            finally:
+                # Release pixel buffers now rather than whenever the garbage collector runs
+                for base in bases.values():
+                    if base is not original:
+                        base.close()
+        if errors:
+            raise RuntimeError("; ".join(errors))
+        return written
+    
+    def export_frames_for(self, source, input_path: Path, sink: OutputSink, targets: List[dict]) -> List[Future]:
+        """Watermark an animated GIF/WebP or multi-page TIFF frame by frame. Each target keeps the
+        source container, frame durations, loop count and GIF disposal; PNG targets encode WebP
+        losslessly and JPEG targets use their quality setting."""
+        container = source.format
+        specs = [target['spec'] for target in targets]
+        writers = {}
+        errors = []
+        for i, target in enumerate(targets):
+            options = target['options']
+            writers[i] = FrameStreamWriter(io.BytesIO(), container, source.info.get('loop'),
+                                           lossless=options['format'] == "PNG", quality=options['quality'])
+        
+        # Only the current frame is decoded; every frame reuses the cached watermark layer
+        for index in range(source.n_frames):
+            source.seek(index)
+            # GIF and WebP frames decode fully composed, so each one stands on its own; TIFF pages
+            # keep their mode. WebP sets the frame duration while decoding, so read it afterwards
+            frame = source.copy() if container == "TIFF" else source.convert("RGBA")
+            duration = source.info.get('duration', 0)
+            disposal = getattr(source, 'disposal_method', 0)
+            try:
+                for i, writer in list(writers.items()):
+                    base = watermarked = None
+                    try:
+                        options = targets[i]['options']
+                        base = self.downscale(frame, self.output_size(frame.size, options),
+                                              self.output_crop(frame.size, options))
+                        spec = specs[i]
+                        if spec['position'] == "auto" and container != "TIFF" and \
+                                (spec['watermark_type'] == "text" or spec['image_path']):
+                            # Animations pick the anchor on the first frame so the watermark stays put
+                            spec = specs[i] = dict(spec, position=self.auto_position(base, self.render_watermark_layer(spec)))
+                        watermarked = self.apply_watermark(base, spec)
+                        writer.add(watermarked, duration, disposal)
+                    except Exception as e:
+                        errors.append(f"{targets[i]['subfolder'] or '.'}: frame {index}: {e}")
+                        del writers[i]
+                    finally:
+                        if watermarked is not None and watermarked is not base:
+                            watermarked.close()
+                        if base is not None and base is not frame:
+                            base.close()
+            finally:
+                frame.close()
+        
+        written = []
+        for i, writer in writers.items():
+            target = targets[i]
+            try:
+                writer.close()
+                name = self.generate_output_filename(input_path, dict(target['options'], format=container))
+                if target['subfolder']:
+                    name = (Path(target['subfolder']) / name).as_posix()
+                written.append(sink.write(name, writer.fp.getvalue()))
+            except Exception as e:
+                errors.append(f"{target['subfolder'] or '.'}: {e}")
+        if errors:
+            raise RuntimeError("; ".join(errors))
+        return written
+    
+    def export_proof_sheets(self, images: List[str], spec: dict, options: dict, pdf_path,
+                            columns: int = 4, rows: int = 5, tile_size: int = PROOF_TILE_SIZE) -> int:
+        """Write watermarked thumbnails of `images` as a multi-page PDF contact sheet with numbered
+        file names. Tiles render in parallel and pages are appended one at a time, so only one page
+        is held in memory. Returns the number of pages."""
+        per_page = columns * rows
+        gap, caption = 20, 18
+        page_size = (gap + columns * (tile_size + gap), gap + rows * (tile_size + caption + gap))
+        font = self._get_truetype_font(12)
+        pdf_path = Path(pdf_path)
+        tmp_path = pdf_path.with_name(f".{pdf_path.name}.{os.getpid()}.tmp")
+        
+        def tile_for(image_path):
+            try:
+                return self.render_proof_tile(image_path, spec, options, tile_size)
+            except Exception as e:
+                print(f"Failed to render tile for {image_path}: {e}")
+                return None
+        
+        pages = 0
+        try:
+            with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+                for start in range(0, len(images), per_page):
+                    chunk = images[start:start + per_page]
+                    page = Image.new("RGB", page_size, "white")
+                    draw = ImageDraw.Draw(page)
+                    for i, (image_path, tile) in enumerate(zip(chunk, executor.map(tile_for, chunk))):
+                        x = gap + (i % columns) * (tile_size + gap)
+                        y = gap + (i // columns) * (tile_size + caption + gap)
+                        if tile is None:
+                            draw.rectangle((x, y, x + tile_size, y + tile_size), outline="#999999")
+                            draw.text((x + 8, y + 8), "Failed to load", fill="#999999", font=font)
+                        else:
+                            page.paste(tile, (x + (tile_size - tile.width) // 2, y + (tile_size - tile.height) // 2))
+                        name = f"{start + i + 1}. {Path(image_path).name}"
+                        while len(name) > 4 and draw.textlength(name, font=font) > tile_size:
+                            name = name[:-4] + "..."
+                        draw.text((x, y + tile_size + 3), name, fill="black", font=font)
+                    # Later pages are appended to the file as incremental updates
+                    page.save(tmp_path, "PDF", resolution=150, append=pages > 0)
+                    page.close()
+                    pages += 1
+            os.replace(tmp_path, pdf_path)
+        except BaseException:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            raise
+        return pages
+    
+    def _export_within_budget(self, image_path, sink: OutputSink, targets: List[dict]) -> List[Path]:
+        """Export one file while holding its estimated memory in the shared budget; waits for the writes"""
+        with self.memory_budget.reserve(self.estimate_job_memory(image_path, targets)):
+            futures = self.export_targets_for(image_path, sink, targets)
+        return [future.result() for future in futures]
+    
+    def encode_image(self, watermarked, options: dict) -> bytes:
+        """Encode a watermarked image in the requested output format into memory. The source mode
+        is kept where the format can store it (JPEG: L, RGB, CMYK; PNG: also LA, P, RGBA, 16-bit)."""
+        buffer = io.BytesIO()
+        mode = watermarked.mode
+        if options['format'] == "JPEG":
+            if mode in DEEP_GRAY_MODES or mode in ("LA", "1"):
+                watermarked = _to_8bit(watermarked).convert("L")
+            elif mode not in ("RGB", "L", "CMYK"):
+                watermarked = watermarked.convert("RGB")
+            # The JPEG encoder only embeds a profile when it is passed explicitly
+            watermarked.save(buffer, "JPEG", quality=options['quality'],
+                             icc_profile=watermarked.info.get('icc_profile'))
+        else:
+            if mode == "CMYK":
+                watermarked = watermarked.convert("RGB")
+                # The source's CMYK ICC profile does not describe the converted pixels
+                watermarked.info.pop('icc_profile', None)
+            elif mode == "I;16L":
+                watermarked = watermarked.convert("I;16")
+            elif mode not in ("1", "L", "LA", "P", "RGB", "RGBA", "I", "I;16", "I;16B"):
+                watermarked = watermarked.convert("RGBA")
+            watermarked.save(buffer, "PNG", icc_profile=watermarked.info.get('icc_profile'))
+        return buffer.getvalue()
+    
+    def create_sink(self, kind: str, output_path: Path) -> OutputSink:
+        """Create the output stage for an export: a folder, or one ZIP/TAR archive in the output folder"""
+        if kind in ('zip', 'tar'):
+            stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            return ArchiveSink(output_path / f"watermarked_{stamp}.{kind}", kind)
+        return DirectorySink(output_path)
+    
+    def export_images(self, targets: Optional[List[dict]] = None, sink_kind: str = "folder"):
         """Export images (executed in background thread)"""
         try:
+            if targets is None:
+                targets = self._collect_export_targets()
             output_path = Path(self.output_dir)
             output_path.mkdir(parents=True, exist_ok=True)
             
-            success_count = 0
-            total_count = len(self.images)
-            
-            for i, image_path in enumerate(self.images):
-                try:
-                    # Load original image
-                    original = Image.open(image_path)
-                    
-                    # Apply watermark
-                    watermarked = self.apply_watermark(original)
-                    
-                    # Generate output filename
-                    input_path = Path(image_path)
-                    output_filename = self.generate_output_filename(input_path)
-                    output_file = output_path / output_filename
-                    
-                    # Save image
-                    if self.output_format.get() == "JPEG":
-                        if watermarked.mode == "RGBA":
-                            watermarked = watermarked.convert("RGB")
-                        watermarked.save(output_file, "JPEG", quality=self.quality.get())
-                    else:
-                        watermarked.save(output_file, "PNG")
-                    
-                    success_count += 1
-                    
-                except Exception as e:
-                    print(f"Failed to process {image_path}: {e}")
+            images = list(self.images)
+            total_count = len(images)
+            sink = self.create_sink(sink_kind, output_path)
+            try:
+                success_count = self.run_budgeted_export(images, sink, targets)
+            finally:
+                sink.close()
             
             # Show result on main thread
             self.root.after(0, self.export_finished, success_count, total_count)
@@ -876,15 +3228,87 @@ class WatermarkApp:
         finally:
             self.root.after(0, self.progress.stop)
     
-    def generate_output_filename(self, input_path):
-        """Generate output filename"""
+    def run_budgeted_export(self, images: List[str], sink: OutputSink, targets: List[dict],
+                            max_workers: Optional[int] = None,
+                            on_result: Optional[Callable[[str, Optional[list], Optional[Exception]], None]] = None) -> int:
+        """Export images concurrently, starting a job only when its estimated memory fits the budget.
+        Returns the number of images whose outputs were all committed; `on_result(image_path,
+        outputs, error)` is called once per image, as soon as that image is done."""
+        def job(image_path):
+            # Reserved by the worker that runs the job, so queued jobs hold no budget and a
+            # large file waiting for room only holds up its own worker
+            granted = self.memory_budget.acquire(self.estimate_job_memory(image_path, targets))
+            try:
+                return self.export_targets_for(image_path, sink, targets)
+            finally:
+                self.memory_budget.release(granted)
+        
+        success_count = 0
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as executor:
+            jobs = {executor.submit(job, image_path): image_path for image_path in images}
+            for job_future in as_completed(jobs):
+                image_path = jobs[job_future]
+                try:
+                    outputs = [write_future.result() for write_future in job_future.result()]
+                    success_count += 1
+                except Exception as e:
+                    print(f"Failed to process {image_path}: {e}")
+                    if on_result:
+                        on_result(image_path, None, e)
+                else:
+                    if on_result:
+                        on_result(image_path, outputs, None)
+        return success_count
+    
+    def run_shard(self, manifest: BatchManifest, index: int, count: int,
+                  max_workers: Optional[int] = None) -> Tuple[int, int]:
+        """Export shard `index` of `count` from a manifest into its output folder, skipping inputs
+        its journal already has as done. Returns (done, failed) for this run."""
+        journal = manifest.load_journal(index, count)
+        selected = manifest.shard(index, count)
+        images = [path for path in selected if journal.get(path, {}).get('status') != 'done']
+        print(f"Shard {index}/{count}: {len(images)} to export, {len(selected) - len(images)} already done")
+        
+        done = failed = 0
+        def record(image_path, outputs, error):
+            nonlocal done, failed
+            if error is None:
+                journal[image_path] = {'status': 'done', 'outputs': [str(output) for output in outputs]}
+                done += 1
+            else:
+                journal[image_path] = {'status': 'failed', 'error': str(error)}
+                failed += 1
+        
+        manifest.output_dir.mkdir(parents=True, exist_ok=True)
+        sink = DirectorySink(manifest.output_dir)
+        try:
+            # Export in chunks so the journal is saved as the shard progresses
+            chunk = max(16, (max_workers or os.cpu_count() or 1) * 4)
+            for start in range(0, len(images), chunk):
+                self.run_budgeted_export(images[start:start + chunk], sink, manifest.targets, max_workers, record)
+                manifest.save_journal(index, count, journal)
+        finally:
+            sink.close()
+        if not images:
+            # Shards with nothing left to do still leave a journal for the merge step
+            manifest.save_journal(index, count, journal)
+        print(f"Shard {index}/{count}: {done} done, {failed} failed")
+        return done, failed
+    
+    def generate_output_filename(self, input_path, options: Optional[dict] = None):
+        """Generate output filename (the extension follows the output format)"""
+        if options is None:
+            options = self._collect_export_options()
         stem = input_path.stem
         suffix = input_path.suffix
-        
-        if self.naming_rule.get() == "prefix":
-            return f"{self.prefix_var.get()}{stem}{suffix}"
-        elif self.naming_rule.get() == "suffix":
-            return f"{stem}{self.suffix_var.get()}{suffix}"
+        suffixes = OUTPUT_SUFFIXES[options['format']]
+        if suffix.lower() not in suffixes:
+            suffix = suffixes[0]
+        
+        if options['naming_rule'] == "prefix":
+            return f"{options['prefix']}{stem}{suffix}"
+        elif options['naming_rule'] == "suffix":
+            return f"{stem}{options['suffix']}{suffix}"
         else:
             return f"{stem}{suffix}"
     
@@ -893,14 +3317,54 @@ class WatermarkApp:
         self.progress.stop()
         messagebox.showinfo("Done", f"Export completed!\nSuccessfully processed: {success_count}/{total_count} images")
     
-    def save_template(self):
-        """Save template"""
-        template_name = tk.simpledialog.askstring("Save Template", "Enter template name:")
-        if not template_name:
+    def toggle_watch(self):
+        """Start or stop hot-folder watch mode"""
+        if self.watcher:
+            self.watcher.stop()
+            self.watcher = None
+            self.watch_sink.close()
+            self.watch_sink = None
+            self.watch_button.config(text="Start Watch Folder")
+            self.watch_status_var.set("Watch: stopped")
             return
         
-        # Collect current settings
-        template = {
+        folder = filedialog.askdirectory(title="Select Folder to Watch")
+        if not folder or not self._ensure_output_dir():
+            return
+        
+        # The active targets are captured once; restart watch to pick up changes
+        targets = self._collect_export_targets()
+        self._update_memory_budget()
+        output_path = Path(self.output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+        counts = {'done': 0, 'failed': 0}
+        
+        def on_processed(path, ok):
+            counts['done' if ok else 'failed'] += 1
+            status = f"Watching {Path(folder).name}: {counts['done']} done, {counts['failed']} failed"
+            self.root.after(0, self.watch_status_var.set, status)
+        
+        try:
+            watcher = HotFolderWatcher(
+                folder,
+                lambda path: self._export_within_budget(path, sink, targets),
+                exclude_dirs=[output_path],
+                journal_path=output_path / '.watch_journal.json',
+                on_processed=on_processed
+            )
+        except ValueError:
+            messagebox.showwarning("Warning", "The output folder must not be the watched folder or contain it, "
+                                   "or watermarked files would be picked up again as new images")
+            return
+        sink = self.watch_sink = DirectorySink(output_path)
+        self.watcher = watcher
+        self.watcher.start()
+        self.watch_button.config(text="Stop Watch Folder")
+        self.watch_status_var.set(f"Watching {Path(folder).name}")
+    
+    def _collect_template(self) -> dict:
+        """Collect current watermark settings as a template dict"""
+        return {
             'watermark_type': self.watermark_type.get(),
             'text': self.text_entry.get(),
             'font_family': self.font_family.get(),
@@ -911,8 +3375,19 @@ class WatermarkApp:
             'image_scale': self.image_scale.get(),
             'image_opacity': self.image_opacity.get(),
             'position': self.position_var.get(),
+            'custom_x': self.watermark_config['custom_x'],
+            'custom_y': self.watermark_config['custom_y'],
             'rotation': self.rotation.get()
         }
+    
+    def save_template(self):
+        """Save template"""
+        template_name = tk.simpledialog.askstring("Save Template", "Enter template name:")
+        if not template_name:
+            return
+        
+        # Collect current settings
+        template = self._collect_template()
         
         self.templates[template_name] = template
         self._save_template_to_file(template_name, template)
@@ -941,6 +3416,8 @@ class WatermarkApp:
             self.image_scale.set(template['image_scale'])
             self.image_opacity.set(template['image_opacity'])
             self.position_var.set(template['position'])
+            self.watermark_config['custom_x'] = template.get('custom_x', 0.5)
+            self.watermark_config['custom_y'] = template.get('custom_y', 0.5)
             self.rotation.set(template['rotation'])
             
             if template['image_path']:
@@ -1029,9 +3506,103 @@ class WatermarkApp:
             messagebox.showerror("Error", f"Failed to save template file: {e}")
 
 
+# Subcommands handled by run_cli; any other command line starts the GUI
+CLI_COMMANDS = ('shard', 'merge', 'proof', 'plan')
+
+
+def run_cli(argv: List[str]) -> int:
+    """Headless batch commands: sharded export across processes or machines, the merged report,
+    proof sheets and dry-run estimates:
+
+        python watermark_gui.py shard batch.json --index 0 --count 4
+        python watermark_gui.py merge batch.json
+        python watermark_gui.py proof batch.json proof.pdf
+        python watermark_gui.py plan batch.json --workers 8
+    """
+    import argparse
+    parser = argparse.ArgumentParser(prog="watermark_gui.py", description="Headless batch commands: sharded export, merge report, PDF proof sheets and dry-run estimates")
+    commands = parser.add_subparsers(dest='command', required=True)
+    shard_parser = commands.add_parser('shard', help="export one shard of a manifest")
+    shard_parser.add_argument('manifest')
+    shard_parser.add_argument('--index', type=int, required=True, help="shard index, 0-based")
+    shard_parser.add_argument('--count', type=int, required=True, help="total number of shards")
+    shard_parser.add_argument('--workers', type=int, default=None, help="render threads (default: CPU count)")
+    shard_parser.add_argument('--memory-mb', type=int, default=0,
+                              help="memory budget for this process (default: half of physical memory)")
+    merge_parser = commands.add_parser('merge', help="combine shard journals and report missing or failed files")
+    merge_parser.add_argument('manifest')
+    proof_parser = commands.add_parser('proof', help="write a manifest's first target as PDF proof sheets")
+    proof_parser.add_argument('manifest')
+    proof_parser.add_argument('pdf')
+    plan_parser = commands.add_parser('plan', help="estimate runtime, peak memory and output size without exporting")
+    plan_parser.add_argument('manifest')
+    plan_parser.add_argument('--workers', type=int, default=None, help="render threads (default: CPU count)")
+    plan_parser.add_argument('--memory-mb', type=int, default=0,
+                             help="memory budget (default: half of physical memory)")
+    plan_parser.add_argument('--sample', default=None, help="calibrate on this image instead of a synthetic one")
+    plan_parser.add_argument('--json', default=None, help="also write the full plan, per file, to this JSON file")
+    args = parser.parse_args(argv)
+    if args.command == 'shard' and not 0 <= args.index < args.count:
+        parser.error(f"--index must be between 0 and {args.count - 1}")
+    
+    manifest = BatchManifest(args.manifest)
+    if args.command == 'shard':
+        app = WatermarkApp.create_renderer()
+        if args.memory_mb > 0:
+            app.memory_budget.set_budget(args.memory_mb * 1024 * 1024)
+        done, failed = app.run_shard(manifest, args.index, args.count, args.workers)
+        return 1 if failed else 0
+    if args.command == 'proof':
+        app = WatermarkApp.create_renderer()
+        target = manifest.targets[0]
+        pages = app.export_proof_sheets([item['path'] for item in manifest.inputs], target['spec'],
+                                        target['options'], args.pdf)
+        print(f"{len(manifest.inputs)} images on {pages} pages written to {args.pdf}")
+        return 0
+    if args.command == 'plan':
+        app = WatermarkApp.create_renderer()
+        if args.memory_mb > 0:
+            app.memory_budget.set_budget(args.memory_mb * 1024 * 1024)
+        calibration = app.calibrate_export(manifest.targets, args.sample)
+        plan = app.plan_export([item['path'] for item in manifest.inputs], manifest.targets,
+                               args.workers, calibration)
+        print(format_plan(plan))
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(plan, f, ensure_ascii=False, indent=2)
+        return 1 if any(item['error'] for item in plan['files']) else 0
+    
+    report = manifest.merge()
+    report_path = manifest.output_dir / ".shards" / f"{manifest.path.stem}.report.json"
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"{report['done']}/{report['total']} done, {len(report['failed'])} failed, {len(report['missing'])} missing")
+    for image_path, error in report['failed'].items():
+        print(f"  failed: {image_path}: {error}")
+    for image_path in report['missing']:
+        print(f"  missing: {image_path}")
+    for name in report['missing_journals']:
+        print(f"  no journal: {name}")
+    print(f"Report written to {report_path}")
+    return 0 if report['done'] == report['total'] else 1
+
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] in CLI_COMMANDS:
+        sys.exit(run_cli(sys.argv[1:]))
     root = tk.Tk()
     app = WatermarkApp(root)
+    
+    def on_close():
+        # Cancel queued contact-sheet tiles; their worker threads would otherwise keep the process alive
+        app.close_contact_sheet()
+        if app.watcher:
+            app.watcher.stop()
+            app.watch_sink.close()
+        root.destroy()
+    
+    root.protocol("WM_DELETE_WINDOW", on_close)
     root.mainloop()
 
 